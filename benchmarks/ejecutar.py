@@ -0,0 +1,208 @@
+"""
+Benchmarks de los caminos críticos del controlador, el modelo y la vista.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.ejecutar
+    python -m benchmarks.ejecutar --tamanos 1000 10000 --salida base.json
+    python -m benchmarks.ejecutar --tamanos 1000 10000 --comparar base.json
+
+Para cada tamaño de historial se mide el mejor tiempo de varias repeticiones y,
+en una corrida aparte con tracemalloc, el pico de memoria. Los resultados se
+escriben en JSON para comparar entre commits. Las mediciones de la vista usan
+una ventana Tk oculta y se omiten si no hay pantalla disponible.
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.generador import generar_historial, escribir_historial
+from controllers.producto_controller import ProductoController
+from models.producto import Producto
+
+TAMANOS = (1000, 10000, 100000, 1000000)
+# Llamadas por medición en los casos que individualmente tardan microsegundos
+LLAMADAS_CONSULTA = 1000
+
+
+def medir(funcion, repeticiones):
+    """
+    Devuelve (mejor tiempo en segundos, pico de memoria en bytes) de `funcion`.
+    El pico se mide en una corrida extra, porque tracemalloc la hace más lenta.
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        gc.collect()
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        funcion()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(tiempos), pico
+
+
+def casos_modelo(datos):
+    return {
+        "Producto.from_dict": lambda: [Producto.from_dict(d) for d in datos],
+        "Producto.from_dict (confiable)": lambda: [Producto.from_dict(d, validar=False) for d in datos],
+    }
+
+
+def casos_controlador(archivo, datos):
+    controller = ProductoController(archivo)
+    fecha = datos[len(datos) // 2]['fecha']
+    termino = datos[0]['nombre'].split()[0].lower()
+
+    def totales_dia():
+        for _ in range(LLAMADAS_CONSULTA):
+            controller.obtener_total_inversion_dia(fecha)
+            controller.obtener_ganancia_total_dia(fecha)
+
+    def buscar_limitado():
+        for _ in range(LLAMADAS_CONSULTA):
+            controller.buscar_por_nombre(termino, 50)
+
+    casos = {
+        "cargar_productos": lambda: ProductoController(archivo).cerrar(),
+        "guardar_productos": controller.guardar_productos,
+        f"buscar_productos('{termino}')": lambda: controller.buscar_productos(termino),
+        f"buscar_por_nombre(límite 50) x{LLAMADAS_CONSULTA}": buscar_limitado,
+        f"totales del día x{LLAMADAS_CONSULTA}": totales_dia,
+        "contar_tipos_productos": controller.contar_tipos_productos,
+    }
+    return controller, casos
+
+
+def casos_vista(controller):
+    """Casos de la vista sobre una ventana oculta, o None si Tk no puede abrirse."""
+    import tkinter as tk
+    from views.main_window import MainWindow
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None, {}
+    root.withdraw()
+    ventana = MainWindow(root, controller)
+
+    def mostrar_historial():
+        ventana.mostrar_historial()
+        # La tabla arma su modelo por tramos programados con after: se mide hasta el último
+        while ventana.historial.cargando:
+            root.update()
+        root.update_idletasks()
+
+    return root, {"MainWindow.mostrar_historial": mostrar_historial}
+
+
+def ejecutar(tamanos, repeticiones=3, dias=365, nombres=500, distribucion="zipf", vista=True):
+    """Ejecuta todos los casos para cada tamaño y devuelve la lista de resultados."""
+    resultados = []
+    for tamano in tamanos:
+        datos = generar_historial(tamano, dias, nombres, distribucion)
+        # Con historiales muy grandes una sola repetición ya toma varios segundos
+        veces = repeticiones if tamano <= 100000 else 1
+        with tempfile.TemporaryDirectory() as directorio:
+            archivo = os.path.join(directorio, "productos.json")
+            escribir_historial(archivo, datos)
+            casos = casos_modelo(datos)
+            controller, casos_ctrl = casos_controlador(archivo, datos)
+            casos.update(casos_ctrl)
+            root = None
+            if vista:
+                root, casos_tk = casos_vista(controller)
+                if root is None:
+                    print("Sin pantalla disponible: se omiten los casos de la vista")
+                casos.update(casos_tk)
+            try:
+                for nombre, funcion in casos.items():
+                    segundos, pico = medir(funcion, veces)
+                    resultados.append({
+                        'tamano': tamano,
+                        'caso': nombre,
+                        'segundos': segundos,
+                        'pico_memoria_bytes': pico,
+                        'repeticiones': veces
+                    })
+                    print(f"{tamano:>9} {nombre:<45} {segundos * 1000:>10.2f} ms "
+                          f"{pico / 1024 / 1024:>9.2f} MB")
+            finally:
+                if root is not None:
+                    root.destroy()
+                controller.cerrar()
+    return resultados
+
+
+def comparar(base, nuevo):
+    """Imprime la variación de tiempos entre dos archivos de resultados."""
+    anteriores = {(r['tamano'], r['caso']): r for r in base['resultados']}
+    print(f"Comparación con {base.get('commit') or 'la base'} ({base['fecha']})")
+    for r in nuevo['resultados']:
+        anterior = anteriores.get((r['tamano'], r['caso']))
+        if anterior is None or not anterior['segundos']:
+            continue
+        factor = r['segundos'] / anterior['segundos']
+        aviso = "  <-- más lento" if factor > 1.2 else ""
+        print(f"{r['tamano']:>9} {r['caso']:<45} {anterior['segundos'] * 1000:>10.2f} -> "
+              f"{r['segundos'] * 1000:>10.2f} ms  x{factor:.2f}{aviso}")
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de PapeleriaApp")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=list(TAMANOS),
+                        help="Cantidades de productos a medir (por defecto 1k, 10k, 100k y 1M)")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--dias", type=int, default=365, help="Días del historial sintético")
+    parser.add_argument("--nombres", type=int, default=500, help="Nombres de producto distintos")
+    parser.add_argument("--distribucion", choices=("zipf", "uniforme"), default="zipf")
+    parser.add_argument("--sin-vista", action="store_true", help="Omitir los casos de Tk")
+    parser.add_argument("--salida", default="benchmarks/resultados.json")
+    parser.add_argument("--comparar", metavar="BASE", help="Resultados anteriores a comparar")
+    args = parser.parse_args(argumentos)
+
+    resultados = ejecutar(args.tamanos, args.repeticiones, args.dias, args.nombres,
+                          args.distribucion, vista=not args.sin_vista)
+    informe = {
+        'fecha': datetime.datetime.now().isoformat(timespec="seconds"),
+        'commit': _commit_actual(),
+        'python': sys.version.split()[0],
+        'plataforma': platform.platform(),
+        'parametros': {
+            'dias': args.dias,
+            'nombres': args.nombres,
+            'distribucion': args.distribucion,
+            'repeticiones': args.repeticiones
+        },
+        'resultados': resultados
+    }
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(informe, f, indent=4)
+    print(f"Resultados guardados en {args.salida}")
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            comparar(json.load(f), informe)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import datetime
+import random
+
+from storage.journal import AlmacenamientoJournal
+
+ARTICULOS = (
+    "Lápiz", "Cuaderno", "Borrador", "Esfero", "Regla", "Carpeta", "Marcador",
+    "Tijeras", "Pegante", "Cartulina", "Resma", "Sacapuntas", "Colores", "Block",
+    "Cinta", "Grapadora", "Ganchos", "Sobre", "Corrector", "Compás"
+)
+VARIANTES = (
+    "negro", "azul", "rojo", "rayado", "cuadriculado", "tamaño carta", "oficio",
+    "x12", "x24", "escolar", "profesional", "pequeño", "grande", "neón", "pastel"
+)
+
+
+def generar_nombres(cantidad, semilla=0):
+    """Genera `cantidad` nombres de producto distintos con aspecto de papelería."""
+    azar = random.Random(semilla)
+    nombres = []
+    vistos = set()
+    while len(nombres) < cantidad:
+        nombre = f"{azar.choice(ARTICULOS)} {azar.choice(VARIANTES)}"
+        if nombre in vistos:
+            nombre = f"{nombre} #{len(nombres)}"
+        vistos.add(nombre)
+        nombres.append(nombre)
+    return nombres
+
+
+def generar_historial(cantidad, dias=365, nombres_distintos=500, distribucion="zipf",
+                      fecha_inicio="2024-01-01", semilla=0):
+    """
+    Genera un historial sintético de compras de papelería (diccionarios en el
+    formato de Producto.to_dict, con IDs 1..cantidad).
+
+    Args:
+        cantidad (int): Cantidad de productos
+        dias (int): Días entre los que se reparten las compras
+        nombres_distintos (int): Cantidad de nombres de producto distintos
+        distribucion (str): "zipf" (pocos nombres muy repetidos) o "uniforme"
+        fecha_inicio (str): Primer día del historial (YYYY-MM-DD)
+        semilla (int): Semilla del generador, para resultados reproducibles
+    """
+    azar = random.Random(semilla)
+    nombres = generar_nombres(nombres_distintos, semilla)
+    if distribucion == "zipf":
+        pesos = [1 / (rango + 1) for rango in range(nombres_distintos)]
+    elif distribucion == "uniforme":
+        pesos = None
+    else:
+        raise ValueError(f"Distribución desconocida: {distribucion}")
+    inicio = datetime.date.fromisoformat(fecha_inicio)
+    fechas = [(inicio + datetime.timedelta(days=d)).isoformat() for d in range(dias)]
+    elegidos = azar.choices(nombres, weights=pesos, k=cantidad)
+    # Las compras se registran en orden cronológico
+    dias_compra = sorted(azar.randrange(dias) for _ in range(cantidad))
+    productos = []
+    for id_producto, (nombre, dia) in enumerate(zip(elegidos, dias_compra), start=1):
+        cantidad_unidades = azar.randint(1, 50)
+        precio_unitario = azar.randrange(200, 20000, 50)
+        margen = azar.uniform(1.1, 1.6)
+        productos.append({
+            'id': id_producto,
+            'nombre': nombre,
+            'precio_total': float(precio_unitario * cantidad_unidades),
+            'cantidad': cantidad_unidades,
+            'precio_venta_usuario': float(round(precio_unitario * margen / 50) * 50),
+            'fecha': fechas[dia]
+        })
+    return productos
+
+
+def escribir_historial(archivo, productos):
+    """Escribe un historial generado como snapshot del almacenamiento JSON."""
+    almacen = AlmacenamientoJournal(archivo, generaciones=0)
+    almacen.compactar(productos)
+    almacen.cerrar()
@@ -0,0 +1,167 @@
+import operator
+from collections import namedtuple
+from utils.normalizacion import normalizar_nombre
+
+# Criterios del filtro del historial; None (o "") significa sin restricción.
+# Fechas YYYY-MM-DD inclusive; los nombres se comparan sin tildes ni mayúsculas;
+# el margen es la ganancia unitaria como porcentaje del precio unitario
+# (un producto de costo 0 tiene margen infinito).
+Filtro = namedtuple('Filtro', [
+    'desde', 'hasta', 'nombre_contiene', 'nombre_prefijo',
+    'precio_min', 'precio_max', 'cantidad_min', 'cantidad_max',
+    'margen_min', 'margen_max'
+], defaults=(None,) * 10)
+
+# Atributo del producto de cada par de límites numéricos
+_LIMITES = (
+    ('precio_min', 'precio_max', 'precio_total'),
+    ('cantidad_min', 'cantidad_max', 'cantidad'),
+)
+
+
+def _fecha(producto):
+    return producto.fecha
+
+
+def _normalizado(filtro):
+    """Copia del filtro con los textos normalizados y los vacíos como None."""
+    return filtro._replace(
+        desde=filtro.desde or None,
+        hasta=filtro.hasta or None,
+        nombre_contiene=normalizar_nombre(filtro.nombre_contiene) if filtro.nombre_contiene else None,
+        nombre_prefijo=normalizar_nombre(filtro.nombre_prefijo) if filtro.nombre_prefijo else None,
+    )
+
+
+def _al_menos(atributo, minimo):
+    leer = operator.attrgetter(atributo)
+    return lambda p: leer(p) >= minimo
+
+
+def _a_lo_sumo(atributo, maximo):
+    leer = operator.attrgetter(atributo)
+    return lambda p: leer(p) <= maximo
+
+
+def compilar_filtro(filtro):
+    """
+    Convierte un filtro en un solo predicado sobre productos: una condición por
+    cada criterio presente, y el producto pasa si las cumple todas.
+    """
+    filtro = _normalizado(filtro)
+    condiciones = []
+    if filtro.desde:
+        desde = filtro.desde
+        condiciones.append(lambda p: p.fecha >= desde)
+    if filtro.hasta:
+        hasta = filtro.hasta
+        condiciones.append(lambda p: p.fecha <= hasta)
+    if filtro.nombre_contiene:
+        contiene = filtro.nombre_contiene
+        condiciones.append(lambda p: contiene in p.clave_nombre)
+    if filtro.nombre_prefijo:
+        prefijo = filtro.nombre_prefijo
+        condiciones.append(lambda p: p.clave_nombre.startswith(prefijo))
+    for minimo, maximo, atributo in _LIMITES:
+        if getattr(filtro, minimo) is not None:
+            condiciones.append(_al_menos(atributo, getattr(filtro, minimo)))
+        if getattr(filtro, maximo) is not None:
+            condiciones.append(_a_lo_sumo(atributo, getattr(filtro, maximo)))
+    # margen >= m  <=>  precio_venta * cantidad * 100 >= (100 + m) * precio_total.
+    # Sin dividir, los productos justo en el límite no se pierden por redondeo
+    # (costo 0: margen infinito)
+    if filtro.margen_min is not None:
+        factor_min = 100 + filtro.margen_min
+        condiciones.append(
+            lambda p: p.precio_venta_usuario * p.cantidad * 100 >= factor_min * p.precio_total)
+    if filtro.margen_max is not None:
+        factor_max = 100 + filtro.margen_max
+        condiciones.append(
+            lambda p: p.precio_total > 0
+            and p.precio_venta_usuario * p.cantidad * 100 <= factor_max * p.precio_total)
+    if len(condiciones) == 1:
+        return condiciones[0]
+    return lambda p: all(condicion(p) for condicion in condiciones)
+
+
+def es_mas_estricto(nuevo, anterior):
+    """
+    True si todo producto que cumple `nuevo` también cumple `anterior`, es decir,
+    si los resultados de `nuevo` se pueden sacar de los de `anterior`.
+    """
+    nuevo = _normalizado(nuevo)
+    anterior = _normalizado(anterior)
+    if anterior.desde and not (nuevo.desde and nuevo.desde >= anterior.desde):
+        return False
+    if anterior.hasta and not (nuevo.hasta and nuevo.hasta <= anterior.hasta):
+        return False
+    if anterior.nombre_contiene and not (
+            nuevo.nombre_contiene and anterior.nombre_contiene in nuevo.nombre_contiene):
+        return False
+    if anterior.nombre_prefijo and not (
+            nuevo.nombre_prefijo and nuevo.nombre_prefijo.startswith(anterior.nombre_prefijo)):
+        return False
+    limites = [(m, M) for m, M, _ in _LIMITES] + [('margen_min', 'margen_max')]
+    for minimo, maximo in limites:
+        a, n = getattr(anterior, minimo), getattr(nuevo, minimo)
+        if a is not None and (n is None or n < a):
+            return False
+        a, n = getattr(anterior, maximo), getattr(nuevo, maximo)
+        if a is not None and (n is None or n > a):
+            return False
+    return True
+
+
+class MotorFiltros:
+    """
+    Aplica filtros al historial de un controlador.
+
+    Cada filtro se resuelve con un plan: los candidatos salen del índice de
+    nombres si con él quedan pocos, o si no del rango del índice de fechas, y
+    sobre ellos se evalúa el predicado compilado. Si el filtro nuevo solo ajusta
+    el anterior (por ejemplo, una letra más en el nombre o un mínimo más alto) y
+    el historial no cambió, se filtran los resultados anteriores en lugar de
+    volver a recorrer el historial.
+    """
+
+    # Los candidatos del índice de nombres se usan si son al menos tantas veces
+    # menos que los del rango de fechas (ordenarlos cuesta más que recorrer)
+    FACTOR_ORDENAR = 4
+
+    def __init__(self, controller):
+        self.controller = controller
+        # (filtro, versión del historial, resultados) del último filtro aplicado
+        self._ultimo = None
+
+    def aplicar(self, filtro):
+        """Devuelve los productos que cumplen el filtro, ordenados por fecha y luego por ID."""
+        predicado = compilar_filtro(filtro)
+        version = self.controller.version
+        ultimo = self._ultimo
+        if ultimo is not None and ultimo[1] == version and es_mas_estricto(filtro, ultimo[0]):
+            resultados = [p for p in ultimo[2] if predicado(p)]
+        else:
+            resultados = [p for p in self._candidatos(_normalizado(filtro)) if predicado(p)]
+        self._ultimo = (filtro, version, resultados)
+        return resultados
+
+    def _candidatos(self, filtro):
+        """
+        Candidatos en orden de fecha e ID. Los índices de nombres dan pocos IDs pero
+        sin orden, y ordenarlos solo conviene si son bastantes menos que los
+        productos del rango de fechas; si no, se recorre el rango (ya ordenado).
+        """
+        controller = self.controller
+        en_rango = controller.contar_productos(filtro.desde, filtro.hasta)
+        ids = None
+        if filtro.nombre_prefijo:
+            ids = controller.indice_nombres.ids_con_prefijo(filtro.nombre_prefijo)
+        if filtro.nombre_contiene and (
+                ids is None or controller.contar_productos(nombre=filtro.nombre_contiene) < len(ids)):
+            ids = controller.indice_nombres.buscar(filtro.nombre_contiene)
+        if ids is not None and len(ids) * self.FACTOR_ORDENAR < en_rango:
+            # Por ID y luego (orden estable) por fecha: queda ordenado por (fecha, ID)
+            candidatos = [controller.productos[i] for i in sorted(ids)]
+            candidatos.sort(key=_fecha)
+            return candidatos
+        return controller.productos_por_fecha(filtro.desde, filtro.hasta)
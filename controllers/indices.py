@@ -0,0 +1,297 @@
+import bisect
+import datetime
+import heapq
+from utils.normalizacion import normalizar_nombre
+
+
+class ResumenFecha:
+    """Totales acumulados de un conjunto de productos (un día o un rango de días)."""
+
+    def __init__(self):
+        self.total_inversion = 0
+        self.ganancia_total = 0
+        self.cantidad = 0
+        # Clave normalizada del nombre -> cantidad de registros (permite restar bajas)
+        self.nombres = {}
+
+    @property
+    def tipos(self):
+        """Cantidad de nombres de producto distintos (sin distinguir tildes ni mayúsculas)."""
+        return len(self.nombres)
+
+    def _sumar(self, producto):
+        self.total_inversion += producto.precio_total
+        self.ganancia_total += producto.ganancia_total
+        self.cantidad += 1
+        self.nombres[producto.clave_nombre] = self.nombres.get(producto.clave_nombre, 0) + 1
+
+    def _restar(self, producto):
+        self.total_inversion -= producto.precio_total
+        self.ganancia_total -= producto.ganancia_total
+        self.cantidad -= 1
+        restantes = self.nombres[producto.clave_nombre] - 1
+        if restantes:
+            self.nombres[producto.clave_nombre] = restantes
+        else:
+            del self.nombres[producto.clave_nombre]
+
+    def _combinar(self, otro):
+        self.total_inversion += otro.total_inversion
+        self.ganancia_total += otro.ganancia_total
+        self.cantidad += otro.cantidad
+        for nombre, ocurrencias in otro.nombres.items():
+            self.nombres[nombre] = self.nombres.get(nombre, 0) + ocurrencias
+
+
+def _id_de(producto):
+    return producto.id
+
+
+def limites_semana(fecha):
+    """(lunes, domingo) de la semana que contiene la fecha, como textos YYYY-MM-DD."""
+    dia = datetime.date.fromisoformat(fecha)
+    lunes = dia - datetime.timedelta(days=dia.weekday())
+    domingo = lunes + datetime.timedelta(days=6)
+    return lunes.isoformat(), domingo.isoformat()
+
+
+def limites_mes(anio, mes):
+    """(primer, último) día posible de un mes calendario, como textos YYYY-MM-DD."""
+    prefijo = f"{anio:04d}-{mes:02d}"
+    return prefijo + "-01", prefijo + "-31"
+
+
+class IndiceFechas:
+    """
+    Resumen por fecha mantenido de forma incremental.
+
+    Cada alta, actualización o baja ajusta solo el resumen de su fecha, por lo
+    que los totales de un día se consultan en O(1). Las fechas se guardan
+    ordenadas para responder consultas por rango (semana, mes, intervalo).
+
+    También guarda los productos de cada fecha ordenados por ID: recorrer las
+    fechas en orden da el historial ordenado (ver productos) sin ordenar nada.
+    """
+
+    def __init__(self, productos=()):
+        self._resumenes = {}
+        self._fechas = []
+        self._productos = {}
+        self._global = ResumenFecha()
+        for producto in productos:
+            self.agregar(producto)
+
+    def agregar(self, producto):
+        """Suma un producto al resumen de su fecha."""
+        resumen = self._resumenes.get(producto.fecha)
+        if resumen is None:
+            resumen = self._resumenes[producto.fecha] = ResumenFecha()
+            self._productos[producto.fecha] = []
+            bisect.insort(self._fechas, producto.fecha)
+        resumen._sumar(producto)
+        self._global._sumar(producto)
+        grupo = self._productos[producto.fecha]
+        if not grupo or grupo[-1].id < producto.id:
+            # Lo habitual: las altas llegan con IDs crecientes
+            grupo.append(producto)
+        else:
+            # Un producto restituido (deshacer una baja) vuelve a su lugar
+            bisect.insort(grupo, producto, key=_id_de)
+
+    def quitar(self, producto):
+        """Resta un producto del resumen de su fecha."""
+        resumen = self._resumenes[producto.fecha]
+        resumen._restar(producto)
+        self._global._restar(producto)
+        grupo = self._productos[producto.fecha]
+        grupo.pop(bisect.bisect_left(grupo, producto.id, key=_id_de))
+        if not resumen.cantidad:
+            # Sin productos: se descarta para no arrastrar residuos de redondeo
+            del self._resumenes[producto.fecha]
+            del self._productos[producto.fecha]
+            self._fechas.pop(bisect.bisect_left(self._fechas, producto.fecha))
+
+    def resumen(self, fecha):
+        """Resumen de una fecha (vacío si no hay productos en ella)."""
+        return self._resumenes.get(fecha) or ResumenFecha()
+
+    def rango(self, desde, hasta):
+        """Resumen combinado de las fechas entre `desde` y `hasta` (inclusive, YYYY-MM-DD)."""
+        total = ResumenFecha()
+        inicio = bisect.bisect_left(self._fechas, desde)
+        fin = bisect.bisect_right(self._fechas, hasta)
+        for fecha in self._fechas[inicio:fin]:
+            total._combinar(self._resumenes[fecha])
+        return total
+
+    def semana(self, fecha):
+        """Resumen de la semana (lunes a domingo) que contiene la fecha dada."""
+        return self.rango(*limites_semana(fecha))
+
+    def mes(self, anio, mes):
+        """Resumen de un mes calendario."""
+        return self.rango(*limites_mes(anio, mes))
+
+    def total(self):
+        """Resumen de todo el historial."""
+        return self._global
+
+    def fechas(self):
+        """Fechas con productos, en orden ascendente."""
+        return list(self._fechas)
+
+    def _fechas_entre(self, desde, hasta):
+        inicio = 0 if desde is None else bisect.bisect_left(self._fechas, desde)
+        fin = len(self._fechas) if hasta is None else bisect.bisect_right(self._fechas, hasta)
+        return self._fechas[inicio:fin]
+
+    def productos(self, desde=None, hasta=None, descendente=False):
+        """
+        Recorre los productos ordenados por fecha (y por ID dentro de cada fecha),
+        opcionalmente solo los de `desde` a `hasta` (inclusive, YYYY-MM-DD).
+        No hay que modificar el historial mientras se recorre.
+        """
+        fechas = self._fechas_entre(desde, hasta)
+        if descendente:
+            for fecha in reversed(fechas):
+                yield from reversed(self._productos[fecha])
+        else:
+            for fecha in fechas:
+                yield from self._productos[fecha]
+
+    def grupos(self):
+        """
+        Recorre pares (fecha, productos de esa fecha ordenados por ID) en orden de
+        fecha. Cada grupo se copia recién al llegar a él, así que el historial puede
+        cambiar entre paso y paso: cada grupo refleja el estado de ese momento.
+        """
+        for fecha in self.fechas():
+            grupo = self._productos.get(fecha)
+            if grupo:
+                yield fecha, list(grupo)
+
+    def contar(self, desde=None, hasta=None):
+        """Cantidad de productos entre `desde` y `hasta` (inclusive; sin límites, todos)."""
+        if desde is None and hasta is None:
+            return self._global.cantidad
+        return sum(len(self._productos[fecha]) for fecha in self._fechas_entre(desde, hasta))
+
+    def productos_de(self, fecha):
+        """Productos de una fecha, ordenados por ID (lista vacía si no hay)."""
+        return list(self._productos.get(fecha, ()))
+
+
+class IndiceNombres:
+    """
+    Índice de trigramas sobre los nombres de producto para búsquedas por subcadena.
+
+    Trabaja con la clave normalizada que cada producto calcula al crearse
+    (sin tildes ni mayúsculas), así que "Lápiz", "lapiz" y "LÁPIZ" son el mismo
+    nombre. Los trigramas apuntan a nombres distintos (normalmente muchos menos
+    que los productos) y cada nombre a los IDs que lo usan. Una búsqueda intersecta los
+    conjuntos de sus trigramas y solo verifica la subcadena en esos candidatos.
+    """
+
+    def __init__(self, productos=()):
+        self._trigramas = {}
+        self._ids_por_nombre = {}
+        # Última búsqueda (término, nombres coincidentes): al escribir una letra más
+        # solo se revisan los nombres que ya coincidían
+        self._ultima_busqueda = None
+        for producto in productos:
+            self.agregar(producto)
+
+    @staticmethod
+    def _trigramas_de(texto):
+        return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+    def agregar(self, producto):
+        """Indexa el nombre de un producto."""
+        nombre = producto.clave_nombre
+        ids = self._ids_por_nombre.get(nombre)
+        if ids is None:
+            self._ultima_busqueda = None
+            ids = self._ids_por_nombre[nombre] = set()
+            for trigrama in self._trigramas_de(nombre):
+                self._trigramas.setdefault(trigrama, set()).add(nombre)
+        ids.add(producto.id)
+
+    def quitar(self, producto):
+        """Quita un producto del índice (y su nombre si ya nadie lo usa)."""
+        nombre = producto.clave_nombre
+        ids = self._ids_por_nombre[nombre]
+        ids.discard(producto.id)
+        if not ids:
+            self._ultima_busqueda = None
+            del self._ids_por_nombre[nombre]
+            for trigrama in self._trigramas_de(nombre):
+                nombres = self._trigramas[trigrama]
+                nombres.discard(nombre)
+                if not nombres:
+                    del self._trigramas[trigrama]
+
+    def buscar(self, termino, limite=None):
+        """
+        Devuelve los IDs de los productos cuyo nombre contiene el término,
+        ordenados por relevancia: coincidencia exacta, prefijo, inicio de
+        palabra y luego posición de la subcadena (a igualdad, el nombre más
+        corto primero). Con `limite` se detiene al juntar esa cantidad.
+        """
+        ids = []
+        for nombre in self._nombres_coincidentes(termino, limite):
+            ids.extend(self._ids_por_nombre[nombre])
+            if limite is not None and len(ids) >= limite:
+                return ids[:limite]
+        return ids
+
+    def contar(self, termino):
+        """Cantidad de productos cuyo nombre contiene el término."""
+        return sum(len(self._ids_por_nombre[n]) for n in self._nombres_coincidentes(termino))
+
+    def ids_con_prefijo(self, prefijo):
+        """IDs de los productos cuyo nombre empieza con el prefijo (sin orden particular)."""
+        prefijo = normalizar_nombre(prefijo)
+        ids = []
+        # Se recorren los nombres distintos, no los productos
+        for nombre, ids_nombre in self._ids_por_nombre.items():
+            if nombre.startswith(prefijo):
+                ids.extend(ids_nombre)
+        return ids
+
+    def _nombres_coincidentes(self, termino, limite=None):
+        """
+        Nombres distintos que contienen el término, ordenados por relevancia
+        (solo los `limite` más relevantes si se indica).
+        """
+        termino = normalizar_nombre(termino)
+        trigramas = self._trigramas_de(termino)
+        anterior = self._ultima_busqueda
+        if anterior is not None and anterior[0] in termino:
+            candidatos = anterior[1]
+        elif trigramas:
+            conjuntos = sorted((self._trigramas.get(t, ()) for t in trigramas), key=len)
+            candidatos = set(conjuntos[0]).intersection(*conjuntos[1:])
+        else:
+            # Términos de menos de tres letras: se revisan los nombres distintos
+            candidatos = self._ids_por_nombre
+        coincidencias = []
+        for nombre in candidatos:
+            posicion = nombre.find(termino)
+            if posicion < 0:
+                continue
+            if nombre == termino:
+                rango = 0
+            elif posicion == 0:
+                rango = 1
+            elif nombre[posicion - 1] == " ":
+                rango = 2
+            else:
+                rango = 3
+            coincidencias.append((rango, posicion, len(nombre), nombre))
+        self._ultima_busqueda = (termino, [c[3] for c in coincidencias])
+        if limite is not None:
+            # Cada nombre aporta al menos un ID: alcanza con los `limite` mejores
+            coincidencias = heapq.nsmallest(limite, coincidencias)
+        else:
+            coincidencias.sort()
+        return [nombre for *_, nombre in coincidencias]
@@ -1,100 +1,735 @@
-import json
+import contextlib
+import gc
+import heapq
+import itertools
+import math
 import os
+import threading
+import time
+from collections import deque, namedtuple
 from models.producto import Producto
+from utils.importacion import leer_filas, convertir_numero
+from utils.validators import ValidacionError
+from utils.instrumentacion import medido
+from controllers.indices import IndiceFechas, IndiceNombres, limites_semana, limites_mes
+from controllers.filtros import MotorFiltros
+from storage.journal import AlmacenamientoJournal
+from storage.persistencia import TrabajadorPersistencia
 import datetime
 
+# Cambio puntual en los productos, notificado a los suscriptores.
+# tipo: "insertado", "actualizado" o "eliminado"; id_producto: ID persistente;
+# anterior: producto reemplazado (solo en "actualizado").
+# tipo "recargado" (sin producto): cambiaron muchos productos a la vez y
+# conviene releer todo en lugar de aplicar cambio por cambio.
+# tipo "lote" (sin producto): cambios de un lote confirmado, en `cambios`.
+CambioProducto = namedtuple('CambioProducto', ['tipo', 'id_producto', 'producto', 'anterior', 'cambios'],
+                            defaults=(None,))
+
+# Resultado de leer un archivo de importación: productos válidos (aún sin ID)
+# y errores por fila como tuplas (número de fila, mensaje).
+ResultadoImportacion = namedtuple('ResultadoImportacion', ['productos', 'errores'])
+
+# Historial leído del almacenamiento, listo para aplicarse al controlador
+# (ver leer_historial y aplicar_historial).
+HistorialLeido = namedtuple('HistorialLeido', ['productos', 'siguiente_id', 'indice_fechas',
+                                               'indice_nombres', 'guardar'])
+
+# Claves de orden de consultar_productos ("fecha" y "relevancia" salen ya
+# ordenadas de los índices); el ID desempata para que el orden sea estable.
+CLAVES_ORDEN = {
+    'fecha': lambda p: (p.fecha, p.id),
+    'id': lambda p: p.id,
+    'nombre': lambda p: (p.clave_nombre, p.id),
+    'precio_total': lambda p: (p.precio_total, p.id),
+    'cantidad': lambda p: (p.cantidad, p.id),
+    'ganancia_total': lambda p: (p.ganancia_total, p.id),
+    'relevancia': None,
+}
+
 class ProductoController:
-    def __init__(self):
-        self.productos = []
-        self.archivo_db = "db/productos.json"
-        self.cargar_productos()
+    def __init__(self, archivo_db="db/productos.json", backend="json", segundo_plano=False, cargar=True):
+        """
+        Args:
+            archivo_db (str): Ruta del historial JSON
+            backend (str): "json" (snapshot + journal), "binario" (snapshot binario
+                + journal) o "sqlite" (base junto al JSON)
+            segundo_plano (bool): Si es True las escrituras las hace un hilo aparte
+                (ver obtener_avisos y cerrar)
+            cargar (bool): Si es False el historial no se lee aquí: hay que llamar a
+                leer_historial (puede ser desde otro hilo) y luego a aplicar_historial
+        """
+        # ID -> producto, en orden de registro
+        self.productos = {}
+        self._siguiente_id = 1
+        self.indice_fechas = IndiceFechas()
+        self.indice_nombres = IndiceNombres()
+        self._suscriptores = []
+        # Aumenta con cada cambio de los productos (invalida resultados guardados)
+        self.version = 0
+        self._motor_filtros = MotorFiltros(self)
+        # Lote en curso (ver lote()): None fuera de un lote
+        self._lote = None
+        self.archivo_db = archivo_db
+        self.almacen = self._crear_almacen(backend)
+        self.persistencia = None
+        self._segundo_plano = segundo_plano
+        # False hasta que se aplica el historial leído del almacenamiento
+        self.cargado = False
+        # La toma leer_historial mientras usa el almacenamiento, para que cerrar
+        # no lo cierre a mitad de la lectura
+        self._leyendo = threading.Lock()
+        # Avisos de carga y guardado en línea (los del hilo los publica el trabajador)
+        self._avisos = deque(maxlen=100)
+        if cargar:
+            self.cargar_productos()
 
+    def _crear_almacen(self, backend):
+        """Crea el almacenamiento seleccionado."""
+        if backend == "json":
+            return AlmacenamientoJournal(self.archivo_db)
+        if backend == "sqlite":
+            # Los motores opcionales se importan solo si se usan (sqlite3 demora el arranque)
+            from storage.sqlite_store import AlmacenamientoSQLite
+            almacen = AlmacenamientoSQLite(os.path.splitext(self.archivo_db)[0] + ".db")
+            # Migración única del historial JSON existente
+            if almacen.esta_vacio() and os.path.exists(self.archivo_db):
+                almacen.importar_json(self.archivo_db)
+            return almacen
+        if backend == "binario":
+            from storage.snapshot_binario import AlmacenamientoBinario
+            almacen = AlmacenamientoBinario(os.path.splitext(self.archivo_db)[0] + ".bin")
+            if not almacen.existe() and os.path.exists(self.archivo_db):
+                almacen.importar_json(self.archivo_db)
+            return almacen
+        raise ValueError(f"Backend de almacenamiento desconocido: {backend}")
+
+    @medido("controlador.cargar_productos")
     def cargar_productos(self):
-        """Carga los productos desde el archivo JSON."""
+        """Carga los productos desde el almacenamiento (snapshot más journal pendiente)."""
+        self.aplicar_historial(self.leer_historial())
+
+    @medido("controlador.leer_historial")
+    def leer_historial(self):
+        """
+        Lee el historial del almacenamiento y arma los productos y sus índices sin
+        tocar el estado del controlador, así que puede llamarse desde otro hilo
+        mientras la ventana ya está visible. El resultado se aplica con aplicar_historial.
+
+        Returns:
+            HistorialLeido: Productos (ID -> producto), próximo ID, índices y si
+            hay que reescribir el snapshot
+        """
+        # Crear cientos de miles de objetos dispara el recolector de ciclos una y otra vez
+        # sin nada que liberar: se pausa mientras dura la carga
+        recolector_activo = gc.isenabled()
+        gc.disable()
+        self._leyendo.acquire()
         try:
-            if not os.path.exists("db"):
-                os.makedirs("db")
-            
-            if os.path.exists(self.archivo_db):
-                with open(self.archivo_db, 'r', encoding='utf-8') as f:
-                    datos = json.load(f)
-                    self.productos = [Producto.from_dict(p) for p in datos]
+            # El historial lo escribe solo la aplicación: se carga sin volver a validar
+            productos = [Producto.from_dict(p, validar=False) for p in self.almacen.cargar()]
+            siguiente_id = max(
+                [self.almacen.ultimo_id] + [p.id for p in productos if p.id is not None]
+            ) + 1
+            sin_id = [p for p in productos if p.id is None]
+            # Historiales anteriores a los IDs persistentes: se numeran en orden de registro
+            for producto in sin_id:
+                producto.id = siguiente_id
+                siguiente_id += 1
+            por_id = {p.id: p for p in productos}
+            generacion = getattr(self.almacen, 'generacion_cargada', 0)
+            if generacion:
+                mensaje = (f"Historial recuperado del respaldo {generacion} "
+                           f"en {self.almacen.duracion_carga * 1000:.0f} ms")
+                print(mensaje)
+                self._avisos.append(('recuperado', mensaje))
+            # Tras recuperar un respaldo se reescribe el snapshot actual
+            guardar = bool(sin_id or generacion or self.almacen.necesita_compactacion())
         except Exception as e:
             print(f"Error al cargar productos: {e}")
-            self.productos = []
+            self._avisos.append(('error', f"Error al cargar productos: {e}"))
+            por_id, siguiente_id, guardar = {}, 1, False
+        finally:
+            self._leyendo.release()
+            if recolector_activo:
+                gc.enable()
+        return HistorialLeido(
+            por_id, siguiente_id, IndiceFechas(por_id.values()), IndiceNombres(por_id.values()), guardar
+        )
+
+    def aplicar_historial(self, historial):
+        """
+        Reemplaza los productos por un historial leído con leer_historial (en el hilo
+        de la interfaz) y arranca el hilo de escritura si corresponde.
+        Si ya había suscriptores se les notifica un cambio "recargado".
+        """
+        self.productos = historial.productos
+        self._siguiente_id = historial.siguiente_id
+        self.indice_fechas = historial.indice_fechas
+        self.indice_nombres = historial.indice_nombres
+        self.cargado = True
+        # El hilo se crea antes de compactar: así la compactación inicial se encola
+        # en lugar de escribirse aquí
+        if self._segundo_plano and self.persistencia is None:
+            self.persistencia = TrabajadorPersistencia(self.almacen)
+        if historial.guardar:
+            self.guardar_productos()
+        self._notificar("recargado")
 
+    @medido("controlador.guardar_productos")
     def guardar_productos(self):
-        """Guarda los productos en el archivo JSON."""
+        """Compacta el almacenamiento: escribe un snapshot completo y vacía el journal."""
+        self._exigir_cargado()
+        if self._lote is not None:
+            # Dentro de un lote se compacta al confirmarlo
+            self._lote['compactar'] = True
+            return
+        if self.persistencia is not None:
+            # El hilo convierte los productos; aquí solo se copia la lista
+            self.persistencia.compactar(list(self.productos.values()))
+            return
+        inicio = time.perf_counter()
+        try:
+            self.almacen.compactar([p.to_dict() for p in self.productos.values()])
+        except Exception as e:
+            print(f"Error al guardar productos: {e}")
+            self._avisos.append(('error', f"Error al guardar productos: {e}"))
+            return
+        self._avisos.append(('guardado', time.perf_counter() - inicio))
+
+    @medido("controlador.registrar_cambio")
+    def _registrar_cambio(self, registrar, *args):
+        """Anexa un cambio al journal y compacta cuando el journal crece demasiado."""
+        if self._lote is not None:
+            self._lote['operaciones'].append((registrar, args))
+            return
+        if self.persistencia is not None:
+            self.persistencia.registrar(registrar, *args)
+            # El contador del journal lo avanza el hilo y sigue alto hasta que él
+            # compacta: mientras tanto no se encola (ni se copia) otra compactación
+            if self.almacen.necesita_compactacion() and not self.persistencia.compactacion_pendiente:
+                self.guardar_productos()
+            return
+        inicio = time.perf_counter()
         try:
-            if not os.path.exists("db"):
-                os.makedirs("db")
-            
-            with open(self.archivo_db, 'w', encoding='utf-8') as f:
-                json.dump([p.to_dict() for p in self.productos], f, indent=4)
+            registrar(*args)
         except Exception as e:
             print(f"Error al guardar productos: {e}")
+            self._avisos.append(('error', f"Error al guardar productos: {e}"))
+            return
+        self._avisos.append(('guardado', time.perf_counter() - inicio))
+        if self.almacen.necesita_compactacion():
+            self.guardar_productos()
+
+    def obtener_avisos(self):
+        """
+        Avisos desde la última consulta: ("guardado", segundos que tomó),
+        ("recuperado", mensaje) si la carga usó un respaldo, o ("error", mensaje).
+        """
+        # La lectura del historial puede agregar avisos desde otro hilo
+        avisos = []
+        while self._avisos:
+            avisos.append(self._avisos.popleft())
+        if self.persistencia is not None:
+            avisos.extend(self.persistencia.obtener_avisos())
+        return avisos
+
+    def cerrar(self):
+        """Escribe todo lo pendiente y cierra el almacenamiento (llamar al salir)."""
+        # Si el historial se está leyendo en otro hilo, se espera a que termine
+        with self._leyendo:
+            if self.persistencia is not None:
+                self.persistencia.cerrar()
+                self.persistencia = None
+            else:
+                self.almacen.cerrar()
+
+    def suscribir(self, callback):
+        """Registra una función que recibirá un CambioProducto por cada alta, edición o baja."""
+        self._suscriptores.append(callback)
+
+    def _notificar(self, tipo, producto=None, anterior=None):
+        self.version += 1
+        cambio = CambioProducto(tipo, producto.id if producto is not None else None, producto, anterior)
+        if self._lote is not None:
+            self._lote['cambios'].append(cambio)
+            return
+        for callback in self._suscriptores:
+            callback(cambio)
+
+    @contextlib.contextmanager
+    def lote(self):
+        """
+        Agrupa altas, ediciones y bajas en una transacción:
+
+            with controller.lote():
+                controller.agregar_producto(...)
+                controller.eliminar_producto(...)
+
+        Cada cambio se valida en el momento, pero se guarda todo junto al salir
+        del bloque (una sola escritura) y los suscriptores reciben un único cambio
+        "lote". Si el bloque lanza una excepción (p. ej. ValidacionError) se
+        deshacen todos sus cambios y la excepción se propaga. Un lote dentro de
+        otro forma parte del exterior.
+        """
+        if self._lote is not None:
+            yield self
+            return
+        self.iniciar_lote()
+        try:
+            yield self
+        except BaseException:
+            self.deshacer_lote()
+            raise
+        self.confirmar_lote()
+
+    def iniciar_lote(self):
+        """Comienza un lote de cambios (ver lote()); termina con confirmar_lote o deshacer_lote."""
+        if self._lote is not None:
+            raise RuntimeError("Ya hay un lote de cambios en curso")
+        self._lote = {
+            'operaciones': [],
+            'cambios': [],
+            # (ID, producto anterior o None si era un alta), en orden de aplicación
+            'deshacer': [],
+            'compactar': False,
+            'siguiente_id': self._siguiente_id
+        }
+
+    def confirmar_lote(self):
+        """Guarda los cambios del lote con una sola escritura y los notifica juntos."""
+        lote = self._lote
+        self._lote = None
+        if lote['compactar']:
+            self.guardar_productos()
+        elif lote['operaciones']:
+            self._registrar_lote(lote['operaciones'])
+        cambios = lote['cambios']
+        if any(c.tipo == "recargado" for c in cambios):
+            self._notificar("recargado")
+        elif cambios:
+            lote_cambios = CambioProducto("lote", None, None, None, cambios)
+            for callback in self._suscriptores:
+                callback(lote_cambios)
+
+    def deshacer_lote(self):
+        """Descarta los cambios del lote y deja los productos como estaban al iniciarlo."""
+        lote = self._lote
+        self._lote = None
+        self.version += 1
+        reordenar = False
+        for id_producto, anterior in reversed(lote['deshacer']):
+            actual = self.productos.get(id_producto)
+            if actual is not None:
+                self.indice_fechas.quitar(actual)
+                self.indice_nombres.quitar(actual)
+            if anterior is None:
+                del self.productos[id_producto]
+                continue
+            if actual is None:
+                # Un producto eliminado vuelve al final del diccionario
+                reordenar = True
+            self.productos[id_producto] = anterior
+            self.indice_fechas.agregar(anterior)
+            self.indice_nombres.agregar(anterior)
+        if reordenar:
+            # Los IDs crecen con cada alta: ordenarlos restituye el orden de registro
+            self.productos = dict(sorted(self.productos.items()))
+        self._siguiente_id = lote['siguiente_id']
+
+    def _anotar_deshacer(self, id_producto, anterior):
+        if self._lote is not None:
+            self._lote['deshacer'].append((id_producto, anterior))
+
+    def _registrar_lote(self, operaciones):
+        """Escribe juntas varias operaciones del journal."""
+        if self.persistencia is not None:
+            self.persistencia.registrar_lote(operaciones)
+            # Ya hay una compactación en camino (ver _registrar_cambio)
+            if self.persistencia.compactacion_pendiente:
+                return
+        else:
+            inicio = time.perf_counter()
+            try:
+                with self.almacen.lote():
+                    for registrar, args in operaciones:
+                        registrar(*args)
+            except Exception as e:
+                print(f"Error al guardar productos: {e}")
+                self._avisos.append(('error', f"Error al guardar productos: {e}"))
+                return
+            self._avisos.append(('guardado', time.perf_counter() - inicio))
+        if self.almacen.necesita_compactacion():
+            self.guardar_productos()
+
+    @property
+    def consultas_disponibles(self):
+        """
+        True si los totales y búsquedas pueden responderse: con el historial ya
+        cargado, o antes si el almacenamiento las resuelve con sus índices (SQLite).
+        """
+        return self.cargado or getattr(self.almacen, 'consultas_indexadas', False)
+
+    def _almacen_consultas(self):
+        """
+        Almacenamiento que resuelve las consultas con sus propios índices, o None
+        si se responden con los índices en memoria. Antes de consultarlo se espera a
+        que estén escritos los cambios encolados; dentro de un lote (cambios todavía
+        sin escribir) se usan los índices en memoria.
+        """
+        if not getattr(self.almacen, 'consultas_indexadas', False) or self._lote is not None:
+            return None
+        if self.persistencia is not None:
+            self.persistencia.esperar()
+        return self.almacen
+
+    def _productos_consultados(self, filas):
+        """Productos de filas consultadas al almacenamiento (los mismos objetos si ya están cargados)."""
+        return [self.productos.get(datos['id']) or Producto.from_dict(datos, validar=False)
+                for datos in filas]
+
+    def _exigir_cargado(self):
+        """
+        Impide modificar el historial antes de aplicar el leído del almacenamiento:
+        los IDs empezarían de nuevo en 1 y el journal pisaría productos existentes.
+        """
+        if not self.cargado:
+            raise RuntimeError("El historial todavía no se cargó")
+
+    def _asignar_id(self):
+        """Devuelve el siguiente ID persistente (nunca se reutilizan IDs eliminados)."""
+        id_producto = self._siguiente_id
+        self._siguiente_id += 1
+        return id_producto
 
     def obtener_productos(self):
-        """Retorna la lista de todos los productos."""
-        return self.productos
+        """Retorna todos los productos en orden de registro."""
+        return self.productos.values()
+
+    def productos_por_fecha(self, desde=None, hasta=None):
+        """
+        Recorre los productos en el orden en que se muestran (por fecha y, dentro
+        de cada fecha, por ID), opcionalmente solo los de un rango de fechas
+        (YYYY-MM-DD, inclusive). El orden lo mantiene el índice de fechas, así que
+        no se ordena nada. Devuelve un iterador: no hay que modificar el historial
+        mientras se recorre (para eso, copiarlo con list()).
+        """
+        return self.indice_fechas.productos(desde, hasta)
+
+    def grupos_por_fecha(self):
+        """
+        Recorre el historial agrupado por fecha: pares (fecha, productos de esa
+        fecha ordenados por ID). A diferencia de productos_por_fecha, se puede
+        recorrer de a tramos mientras el historial cambia (ver IndiceFechas.grupos).
+        """
+        return self.indice_fechas.grupos()
 
     def agregar_producto(self, nombre, precio_total, cantidad, precio_venta_usuario):
         """Agrega un nuevo producto."""
-        producto = Producto(nombre, precio_total, cantidad, precio_venta_usuario)
-        self.productos.append(producto)
-        self.guardar_productos()
+        self._exigir_cargado()
+        producto = Producto(nombre, precio_total, cantidad, precio_venta_usuario,
+                            id_producto=self._asignar_id())
+        self._anotar_deshacer(producto.id, None)
+        self.productos[producto.id] = producto
+        self.indice_fechas.agregar(producto)
+        self.indice_nombres.agregar(producto)
+        self._registrar_cambio(self.almacen.registrar_alta, producto.to_dict())
+        self._notificar("insertado", producto)
         return producto
 
+    def agregar_productos(self, productos):
+        """
+        Agrega de una vez productos ya validados (sin ID). Se guardan en un solo
+        lote de escritura y los suscriptores reciben un único cambio "recargado".
+        Devuelve la cantidad agregada.
+        """
+        self._exigir_cargado()
+        with self.lote():
+            for producto in productos:
+                producto.id = self._asignar_id()
+                self._anotar_deshacer(producto.id, None)
+                self.productos[producto.id] = producto
+                self.indice_fechas.agregar(producto)
+                self.indice_nombres.agregar(producto)
+                # También al journal: los respaldos se reconstruyen reproduciéndolo
+                self._registrar_cambio(self.almacen.registrar_alta, producto.to_dict())
+            if productos:
+                self._notificar("recargado")
+        return len(productos)
+
+    @medido("controlador.leer_importacion")
+    def leer_importacion(self, archivo, tamano_lote=1000, progreso=None):
+        """
+        Lee y valida un archivo CSV o Excel de compras (columnas Nombre, Precio Total,
+        Cantidad, Precio Venta y opcionalmente Fecha) por lotes. Las filas con errores
+        se informan sin detener la lectura. No modifica el historial, así que puede
+        ejecutarse en otro hilo; luego se llama a agregar_productos con el resultado.
+
+        Args:
+            archivo (str): Ruta del archivo .csv o .xlsx
+            tamano_lote (int): Filas procesadas entre cada llamada a `progreso`
+            progreso (callable, optional): Recibe la cantidad de filas leídas
+
+        Raises:
+            ValueError: Si el archivo no tiene las columnas obligatorias
+        """
+        productos = []
+        errores = []
+        filas = leer_filas(archivo)
+        leidas = 0
+        while True:
+            lote = list(itertools.islice(filas, tamano_lote))
+            if not lote:
+                break
+            for numero, datos in lote:
+                try:
+                    productos.append(self._producto_importado(datos))
+                except (ValidacionError, ValueError, TypeError) as e:
+                    errores.append((numero, str(e)))
+            leidas += len(lote)
+            if progreso is not None:
+                progreso(leidas)
+        return ResultadoImportacion(productos, errores)
+
+    def importar_productos(self, archivo):
+        """Lee un archivo de compras y agrega sus productos válidos en un solo lote."""
+        resultado = self.leer_importacion(archivo)
+        self.agregar_productos(resultado.productos)
+        return resultado
+
+    @staticmethod
+    def _producto_importado(datos):
+        """Crea (y valida) un producto a partir de una fila de importación."""
+        nombre = str(datos.get('nombre') or "").strip()
+        try:
+            precio_total = float(convertir_numero(datos.get('precio_total')))
+            cantidad = convertir_numero(datos.get('cantidad'))
+            precio_venta = float(convertir_numero(datos.get('precio_venta_usuario')))
+        except (ValueError, TypeError):
+            raise ValidacionError("Precio o cantidad no numéricos")
+        # "inf" o "1e400" se leen como infinito: no son precios ni cantidades válidos
+        if not all(math.isfinite(valor) for valor in (precio_total, cantidad, precio_venta)):
+            raise ValidacionError("Precio o cantidad fuera de rango")
+        if cantidad != int(cantidad):
+            raise ValidacionError("La cantidad debe ser un número entero")
+        fecha = datos.get('fecha')
+        if hasattr(fecha, 'isoformat'):
+            # Celdas de fecha de Excel (date o datetime)
+            fecha = fecha.isoformat()[:10]
+        elif fecha:
+            fecha = str(fecha).strip()[:10]
+            try:
+                datetime.date.fromisoformat(fecha)
+            except ValueError:
+                raise ValidacionError(f"Fecha inválida: {datos.get('fecha')} (use AAAA-MM-DD)")
+        return Producto(nombre, precio_total, int(cantidad), precio_venta, fecha or None)
+
     def obtener_producto(self, id_producto):
         """Obtiene un producto por su ID."""
-        try:
-            return self.productos[id_producto]
-        except IndexError:
-            return None
+        return self.productos.get(id_producto)
 
     def actualizar_producto(self, id_producto, nombre, precio_total, cantidad, precio_venta_usuario):
-        """Actualiza un producto existente."""
-        if 0 <= id_producto < len(self.productos):
-            producto = Producto(nombre, precio_total, cantidad, precio_venta_usuario)
-            self.productos[id_producto] = producto
-            self.guardar_productos()
-            return True
-        return False
+        """Actualiza un producto existente conservando su ID y su fecha de registro."""
+        self._exigir_cargado()
+        anterior = self.productos.get(id_producto)
+        if anterior is None:
+            return False
+        producto = Producto(nombre, precio_total, cantidad, precio_venta_usuario,
+                            anterior.fecha, id_producto)
+        self._anotar_deshacer(id_producto, anterior)
+        self.indice_fechas.quitar(anterior)
+        self.indice_nombres.quitar(anterior)
+        self.productos[id_producto] = producto
+        self.indice_fechas.agregar(producto)
+        self.indice_nombres.agregar(producto)
+        self._registrar_cambio(self.almacen.registrar_actualizacion, id_producto, producto.to_dict())
+        self._notificar("actualizado", producto, anterior)
+        return True
 
     def eliminar_producto(self, id_producto):
         """Elimina un producto."""
-        if 0 <= id_producto < len(self.productos):
-            self.productos.pop(id_producto)
-            self.guardar_productos()
-            return True
-        return False
+        self._exigir_cargado()
+        producto = self.productos.pop(id_producto, None)
+        if producto is None:
+            return False
+        self._anotar_deshacer(id_producto, producto)
+        self.indice_fechas.quitar(producto)
+        self.indice_nombres.quitar(producto)
+        self._registrar_cambio(self.almacen.registrar_baja, id_producto)
+        self._notificar("eliminado", producto)
+        return True
+
+    @medido("controlador.buscar_por_nombre")
+    def buscar_por_nombre(self, termino, limite=None):
+        """
+        Busca productos cuyo nombre contenga el término (sin distinguir mayúsculas
+        ni tildes) usando el índice de trigramas. Devuelve los resultados ordenados por relevancia,
+        como máximo `limite` si se indica.
+        """
+        almacen = self._almacen_consultas()
+        if almacen is not None:
+            return self._productos_consultados(almacen.buscar(termino, limite))
+        return [self.productos[i] for i in self.indice_nombres.buscar(termino, limite)]
+
+    def contar_por_nombre(self, termino):
+        """Cantidad de productos cuyo nombre contiene el término."""
+        almacen = self._almacen_consultas()
+        if almacen is not None:
+            return almacen.contar_nombre(termino)
+        return self.indice_nombres.contar(termino)
 
+    @medido("controlador.buscar_productos")
     def buscar_productos(self, criterio):
-        """Busca productos por nombre o fecha."""
-        criterio = criterio.lower()
-        return [
-            p for p in self.productos
-            if criterio in p.nombre.lower() or criterio == p.fecha
-        ]
+        """Busca productos por nombre (ordenados por relevancia) o por fecha exacta (YYYY-MM-DD)."""
+        resultados = self.buscar_por_nombre(criterio)
+        almacen = self._almacen_consultas()
+        if almacen is not None:
+            del_dia = self._productos_consultados(almacen.productos_de(criterio))
+        else:
+            del_dia = self.indice_fechas.productos_de(criterio)
+        if del_dia:
+            vistos = {p.id for p in resultados}
+            resultados.extend(p for p in del_dia if p.id not in vistos)
+        return resultados
+
+    @medido("controlador.obtener_productos_filtrados")
+    def obtener_productos_filtrados(self, desde=None, hasta=None, nombre=None):
+        """
+        Devuelve una lista (copia) de los productos en el orden del historial (por
+        fecha y luego por ID), opcionalmente limitada a un rango de fechas
+        (YYYY-MM-DD, inclusive) y a los que contienen un texto en el nombre.
+        """
+        return list(self.consultar_productos(desde, hasta, nombre))
+
+    @medido("controlador.consultar_productos")
+    def consultar_productos(self, desde=None, hasta=None, nombre=None, orden="fecha",
+                            descendente=False, desplazamiento=0, limite=None):
+        """
+        Consulta paginada del historial. Responde desde los índices: el rango de
+        fechas sale del índice de fechas y el nombre del de trigramas, así que solo
+        se recorren los candidatos, y con `limite` solo se ordena lo necesario.
+
+        Args:
+            desde, hasta (str, optional): Rango de fechas (YYYY-MM-DD, inclusive)
+            nombre (str, optional): Texto que debe contener el nombre
+            orden (str): Clave de CLAVES_ORDEN; "relevancia" solo tiene sentido con
+                `nombre` (sin él se ordena por fecha)
+            descendente (bool): Invierte el orden
+            desplazamiento (int): Cantidad de resultados que se saltean
+            limite (int, optional): Máximo de resultados
+
+        Returns:
+            iterator: Productos de la página pedida. No hay que modificar el
+            historial mientras se recorre.
+
+        Raises:
+            ValueError: Si el orden no existe
+        """
+        if orden not in CLAVES_ORDEN:
+            raise ValueError(f"Orden desconocido: {orden}")
+        desde = desde or None
+        hasta = hasta or None
+        fin = None if limite is None else desplazamiento + limite
+        if nombre:
+            # Sin fechas que filtrar, la búsqueda por relevancia se corta en el límite
+            corte = fin if orden == "relevancia" and not (desde or hasta or descendente) else None
+            candidatos = (self.productos[i] for i in self.indice_nombres.buscar(nombre, corte))
+            if desde or hasta:
+                desde = desde or "0000-00-00"
+                hasta = hasta or "9999-99-99"
+                candidatos = (p for p in candidatos if desde <= p.fecha <= hasta)
+            if orden == "relevancia":
+                if descendente:
+                    candidatos = reversed(list(candidatos))
+                return itertools.islice(candidatos, desplazamiento, fin)
+        elif orden in ("fecha", "relevancia"):
+            return itertools.islice(
+                self.indice_fechas.productos(desde, hasta, descendente), desplazamiento, fin)
+        elif orden == "id" and not desde and not hasta:
+            # El diccionario está en orden de ID (orden de registro)
+            valores = self.productos.values()
+            return itertools.islice(reversed(valores) if descendente else iter(valores),
+                                    desplazamiento, fin)
+        else:
+            candidatos = self.indice_fechas.productos(desde, hasta)
+        clave = CLAVES_ORDEN[orden]
+        if fin is not None:
+            # Solo los primeros `fin`: O(n log fin) en lugar de ordenar todo
+            elegir = heapq.nlargest if descendente else heapq.nsmallest
+            elegidos = elegir(fin, candidatos, key=clave)
+        else:
+            elegidos = sorted(candidatos, key=clave, reverse=descendente)
+        return iter(elegidos[desplazamiento:])
+
+    @medido("controlador.filtrar_productos")
+    def filtrar_productos(self, filtro):
+        """
+        Devuelve una lista con los productos que cumplen un Filtro (ver
+        controllers/filtros.py), ordenados por fecha y luego por ID. Al ajustar un
+        filtro se filtran los resultados anteriores en lugar de todo el historial.
+        """
+        return self._motor_filtros.aplicar(filtro)
+
+    def contar_productos(self, desde=None, hasta=None, nombre=None):
+        """Cantidad de productos que devolvería consultar_productos sin paginar."""
+        if not nombre:
+            almacen = self._almacen_consultas()
+            if almacen is not None:
+                return almacen.contar(desde or None, hasta or None)
+            return self.indice_fechas.contar(desde or None, hasta or None)
+        if not desde and not hasta:
+            return self.contar_por_nombre(nombre)
+        return sum(1 for _ in self.consultar_productos(desde, hasta, nombre, orden="relevancia"))
 
     def calcular_total_inversion_dia(self):
         """Calcula el total invertido en el día actual."""
         fecha_actual = datetime.datetime.now().strftime("%Y-%m-%d")
-        return sum(p.precio_total for p in self.productos if p.fecha == fecha_actual)
+        return self.obtener_total_inversion_dia(fecha_actual)
 
     def calcular_ganancia_total_dia(self):
         """Calcula la ganancia total del día actual."""
         fecha_actual = datetime.datetime.now().strftime("%Y-%m-%d")
-        return sum(p.ganancia_total for p in self.productos if p.fecha == fecha_actual)
+        return self.obtener_ganancia_total_dia(fecha_actual)
 
+    @medido("controlador.total_inversion_dia")
     def obtener_total_inversion_dia(self, fecha):
         """Calcula el total invertido en un día específico."""
-        return sum(p.precio_total for p in self.productos if p.fecha == fecha)
+        return self.obtener_resumen_dia(fecha).total_inversion
 
+    @medido("controlador.ganancia_total_dia")
     def obtener_ganancia_total_dia(self, fecha):
         """Calcula la ganancia total de un día específico."""
-        return sum(p.ganancia_total for p in self.productos if p.fecha == fecha) 
+        return self.obtener_resumen_dia(fecha).ganancia_total
+
+    @medido("controlador.resumen_dia")
+    def obtener_resumen_dia(self, fecha):
+        """Devuelve el resumen (inversión, ganancia, cantidad y tipos) de un día."""
+        almacen = self._almacen_consultas()
+        if almacen is not None:
+            return almacen.resumen(fecha, fecha)
+        return self.indice_fechas.resumen(fecha)
+
+    @medido("controlador.resumen_rango")
+    def obtener_resumen_rango(self, desde, hasta):
+        """Devuelve el resumen combinado de un rango de fechas (inclusive)."""
+        almacen = self._almacen_consultas()
+        if almacen is not None:
+            return almacen.resumen(desde, hasta)
+        return self.indice_fechas.rango(desde, hasta)
+
+    @medido("controlador.resumen_semana")
+    def obtener_resumen_semana(self, fecha):
+        """Devuelve el resumen de la semana (lunes a domingo) que contiene la fecha."""
+        return self.obtener_resumen_rango(*limites_semana(fecha))
+
+    @medido("controlador.resumen_mes")
+    def obtener_resumen_mes(self, anio, mes):
+        """Devuelve el resumen de un mes calendario."""
+        return self.obtener_resumen_rango(*limites_mes(anio, mes))
 
     def contar_tipos_productos(self):
-        """Devuelve la cantidad de tipos únicos de productos registrados (por nombre)."""
-        return len(set(p.nombre for p in self.productos)) 
\ No newline at end of file
+        """Devuelve la cantidad de tipos únicos de productos registrados (por nombre normalizado)."""
+        almacen = self._almacen_consultas()
+        if almacen is not None:
+            return almacen.contar_tipos()
+        return self.indice_fechas.total().tipos
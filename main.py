@@ -1,12 +1,72 @@
+import time
+# Referencia para medir el arranque (antes de importar la interfaz y el controlador)
+INICIO = time.perf_counter()
+
+import os
+import sys
 import tkinter as tk
 from controllers.producto_controller import ProductoController
 from views.main_window import MainWindow
+from utils import instrumentacion
+
+def medir_arranque(root, controller, app, al_cerrar):
+    """
+    Modo de medición del arranque (--medir-arranque o PAPELERIA_MEDIR_ARRANQUE=1):
+    informa cuánto tardó el primer cuadro de la ventana y cuánto el historial en
+    quedar visible, y cierra la aplicación.
+    """
+    tiempos = {}
+
+    def registrar(nombre):
+        tiempos[nombre] = time.perf_counter() - INICIO
+        if instrumentacion.esta_activa():
+            instrumentacion.registrar(f"arranque.{nombre}", tiempos[nombre])
+        print(f"Arranque - {nombre}: {tiempos[nombre] * 1000:.0f} ms")
+        if len(tiempos) == 2:
+            root.after_idle(al_cerrar)
+
+    def primer_cuadro(event):
+        if 'primer_cuadro' not in tiempos:
+            registrar('primer_cuadro')
+            root.unbind("<Expose>")
+
+    def tabla_lista():
+        # La tabla arma su modelo por tramos: se espera al último
+        if app.historial.cargando:
+            root.after(1, tabla_lista)
+        elif 'historial_visible' not in tiempos:
+            registrar('historial_visible')
+
+    def historial_visible(cambio):
+        if cambio.tipo == "recargado":
+            root.after_idle(tabla_lista)
+
+    root.bind("<Expose>", primer_cuadro)
+    controller.suscribir(historial_visible)
 
 def main():
     root = tk.Tk()
-    controller = ProductoController()
-    app = MainWindow(root, controller)
-    root.mainloop()
+    # Backend de almacenamiento: "json" (por defecto), "binario" o "sqlite"
+    # El historial se lee después de mostrar la ventana (ver MainWindow)
+    controller = ProductoController(
+        backend=os.environ.get("PAPELERIA_BACKEND", "json"),
+        segundo_plano=True,
+        cargar=False
+    )
+
+    def al_cerrar():
+        # Se escriben los cambios pendientes antes de destruir la ventana
+        controller.cerrar()
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", al_cerrar)
+    try:
+        app = MainWindow(root, controller)
+        if "--medir-arranque" in sys.argv[1:] or os.environ.get("PAPELERIA_MEDIR_ARRANQUE") == "1":
+            medir_arranque(root, controller, app, al_cerrar)
+        root.mainloop()
+    finally:
+        controller.cerrar()
 
 if __name__ == "__main__":
     main()
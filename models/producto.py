@@ -1,8 +1,16 @@
 import datetime
+import sys
 from utils.validators import validar_producto
+from utils.normalizacion import normalizar_nombre
 
 class Producto:
-    def __init__(self, nombre, precio_total, cantidad, precio_venta_usuario, fecha=None):
+    # Sin __dict__ por instancia: con historiales grandes el ahorro de memoria es notable.
+    # Los valores derivados (precio y ganancia unitaria, ganancia total) se calculan al
+    # consultarlos en lugar de guardarse.
+    __slots__ = ('id', 'nombre', 'clave_nombre', 'precio_total', 'cantidad',
+                 'precio_venta_usuario', 'fecha')
+
+    def __init__(self, nombre, precio_total, cantidad, precio_venta_usuario, fecha=None, id_producto=None):
         """
         Inicializa un nuevo producto.
         
@@ -12,17 +20,31 @@ class Producto:
             cantidad (int): Cantidad del producto
             precio_venta_usuario (float): Precio de venta al usuario
             fecha (str, optional): Fecha del producto. Por defecto es la fecha actual
+            id_producto (int, optional): ID persistente asignado por el controlador
         """
         validar_producto(nombre, precio_total, cantidad, precio_venta_usuario)
         
-        self.nombre = nombre
+        self.id = id_producto
+        # Nombres y fechas se repiten mucho: se internan para compartir una sola copia
+        self.nombre = sys.intern(nombre)
+        # Clave normalizada (sin tildes ni mayúsculas) para búsquedas y agrupación
+        self.clave_nombre = sys.intern(normalizar_nombre(nombre))
         self.precio_total = precio_total
         self.cantidad = cantidad
         self.precio_venta_usuario = precio_venta_usuario
-        self.fecha = fecha or datetime.date.today().isoformat()
-        self.precio_unitario = self.calcular_precio_unitario()
-        self.ganancia_unitaria = self.calcular_ganancia_unitaria()
-        self.ganancia_total = self.calcular_ganancia_total()
+        self.fecha = sys.intern(fecha or datetime.date.today().isoformat())
+
+    @property
+    def precio_unitario(self):
+        return self.calcular_precio_unitario()
+
+    @property
+    def ganancia_unitaria(self):
+        return self.calcular_ganancia_unitaria()
+
+    @property
+    def ganancia_total(self):
+        return self.calcular_ganancia_total()
 
     def calcular_precio_unitario(self):
         """Calcula el precio unitario del producto."""
@@ -39,6 +61,7 @@ class Producto:
     def to_dict(self):
         """Convierte el producto a un diccionario para almacenamiento."""
         return {
+            'id': self.id,
             'nombre': self.nombre,
             'precio_total': self.precio_total,
             'cantidad': self.cantidad,
@@ -47,12 +70,30 @@ class Producto:
         }
 
     @classmethod
-    def from_dict(cls, data):
-        """Crea un producto desde un diccionario."""
-        return cls(
-            nombre=data['nombre'],
-            precio_total=data['precio_total'],
-            cantidad=data['cantidad'],
-            precio_venta_usuario=data['precio_venta_usuario'],
-            fecha=data['fecha']
-        ) 
\ No newline at end of file
+    def from_dict(cls, data, validar=True):
+        """
+        Crea un producto desde un diccionario.
+
+        Args:
+            data (dict): Datos del producto (formato de to_dict)
+            validar (bool): Si es False se omite la validación; solo para datos
+                escritos por la propia aplicación (carga del historial)
+        """
+        if validar:
+            return cls(
+                nombre=data['nombre'],
+                precio_total=data['precio_total'],
+                cantidad=data['cantidad'],
+                precio_venta_usuario=data['precio_venta_usuario'],
+                fecha=data['fecha'],
+                id_producto=data.get('id')
+            )
+        producto = cls.__new__(cls)
+        producto.id = data.get('id')
+        producto.nombre = sys.intern(data['nombre'])
+        producto.clave_nombre = sys.intern(normalizar_nombre(data['nombre']))
+        producto.precio_total = data['precio_total']
+        producto.cantidad = data['cantidad']
+        producto.precio_venta_usuario = data['precio_venta_usuario']
+        producto.fecha = sys.intern(data['fecha'])
+        return producto 
\ No newline at end of file
@@ -0,0 +1,311 @@
+import contextlib
+import hashlib
+import json
+import os
+import time
+
+
+class AlmacenamientoJournal:
+    """
+    Almacenamiento de productos basado en un snapshot compactado más un journal
+    de solo-anexado (una línea JSON por alta, actualización o baja).
+
+    Cada cambio cuesta una sola escritura al final del journal. El estado se
+    reconstruye cargando el snapshot y reproduciendo las operaciones del journal
+    posteriores a él.
+
+    Cada compactación escribe el snapshot nuevo en un temporal (con fsync) y lo
+    renombra sobre el anterior, que pasa a ser una generación de respaldo junto
+    con su journal (productos.json.1 + productos.journal.1, etc.). El snapshot
+    lleva un checksum SHA-256; si al cargar la generación actual está dañada, se
+    recupera la más reciente que sea válida.
+    """
+
+    def __init__(self, archivo_snapshot, umbral_compactacion=1000, archivo_journal=None,
+                 generaciones=3):
+        """
+        Args:
+            archivo_snapshot (str): Ruta del snapshot JSON (p. ej. db/productos.json)
+            umbral_compactacion (int): Operaciones en el journal antes de compactar
+            archivo_journal (str, optional): Ruta del journal. Por defecto, la del
+                snapshot con extensión .journal
+            generaciones (int): Generaciones de respaldo que se conservan
+        """
+        self.archivo_snapshot = archivo_snapshot
+        self.archivo_journal = archivo_journal or os.path.splitext(archivo_snapshot)[0] + ".journal"
+        self.umbral_compactacion = umbral_compactacion
+        self.generaciones = generaciones
+        self.secuencia = 0
+        # Mayor ID asignado alguna vez (aunque el producto ya se haya eliminado)
+        self.ultimo_id = 0
+        self.operaciones_pendientes = 0
+        # Generación desde la que se cargó en el último cargar() (0 = la actual)
+        self.generacion_cargada = 0
+        self.duracion_carga = 0.0
+        self.duracion_compactacion = 0.0
+        self._journal = None
+        self._en_lote = False
+
+    def cargar(self):
+        """
+        Reconstruye la lista de productos (como diccionarios) a partir del
+        snapshot y de las operaciones del journal que aún no incluye.
+
+        Si la generación actual no puede leerse (snapshot dañado, checksum
+        incorrecto o ausente tras una compactación interrumpida) se prueba con
+        las de respaldo, de la más nueva a la más vieja.
+        """
+        inicio = time.perf_counter()
+        self._asegurar_directorio()
+        errores = []
+        for generacion in range(self.generaciones + 1):
+            snapshot = self._ruta_generacion(self.archivo_snapshot, generacion)
+            if not os.path.exists(snapshot) and (generacion or any(
+                os.path.exists(self._ruta_generacion(self.archivo_snapshot, g))
+                for g in range(1, self.generaciones + 1)
+            )):
+                # Solo un historial nuevo (sin respaldos) puede no tener snapshot
+                errores.append(f"{snapshot}: no existe")
+                continue
+            try:
+                productos = self._cargar_generacion(generacion)
+            except Exception as e:
+                errores.append(f"{snapshot}: {e}")
+                continue
+            if errores:
+                print("Generaciones descartadas al cargar: " + "; ".join(errores))
+                self._apartar_danado()
+            self.generacion_cargada = generacion
+            self.duracion_carga = time.perf_counter() - inicio
+            return productos
+        # Se aparta el snapshot dañado para que lo que se guarde después no lo pise
+        self._apartar_danado()
+        raise ValueError("Ninguna generación del historial es válida: " + "; ".join(errores))
+
+    def existe(self):
+        """Indica si hay un historial guardado (snapshot actual o de respaldo, o journal)."""
+        return any(
+            os.path.exists(self._ruta_generacion(archivo, generacion))
+            for archivo in (self.archivo_snapshot, self.archivo_journal)
+            for generacion in range(self.generaciones + 1)
+        )
+
+    def registrar_alta(self, datos):
+        """Anexa al journal el alta de un producto."""
+        self.ultimo_id = max(self.ultimo_id, datos['id'])
+        self._anexar({'op': 'alta', 'producto': datos})
+
+    def registrar_actualizacion(self, id_producto, datos):
+        """Anexa al journal la actualización del producto con el ID dado."""
+        self._anexar({'op': 'actualizacion', 'id': id_producto, 'producto': datos})
+
+    def registrar_baja(self, id_producto):
+        """Anexa al journal la eliminación del producto con el ID dado."""
+        self._anexar({'op': 'baja', 'id': id_producto})
+
+    @contextlib.contextmanager
+    def lote(self):
+        """Agrupa varios registros: el journal se vuelca a disco una sola vez, al final."""
+        self._en_lote = True
+        try:
+            yield
+        finally:
+            self._en_lote = False
+            if self._journal is not None:
+                self._vaciar_journal()
+
+    def necesita_compactacion(self):
+        """Indica si el journal creció lo suficiente como para compactarlo."""
+        return self.operaciones_pendientes >= self.umbral_compactacion
+
+    def compactar(self, productos):
+        """
+        Escribe un snapshot completo con la lista de productos (diccionarios)
+        y empieza un journal vacío. El snapshot y el journal anteriores se
+        conservan como generación de respaldo.
+        """
+        inicio = time.perf_counter()
+        self._asegurar_directorio()
+        for datos in productos:
+            self.ultimo_id = max(self.ultimo_id, datos.get('id') or 0)
+        temporal = self.archivo_snapshot + ".tmp"
+        self._escribir_snapshot(temporal, productos)
+        self._sincronizar(temporal)
+        self.cerrar()
+        self._rotar_generaciones()
+        os.replace(temporal, self.archivo_snapshot)
+        # El snapshot ya contiene todo: el journal puede empezar de cero
+        with open(self.archivo_journal, 'w', encoding='utf-8'):
+            pass
+        self._sincronizar_directorio()
+        self.operaciones_pendientes = 0
+        self.duracion_compactacion = time.perf_counter() - inicio
+
+    def cerrar(self):
+        """Cierra el archivo del journal si está abierto."""
+        if self._journal is not None:
+            self._vaciar_journal()
+            self._journal.close()
+            self._journal = None
+
+    def _anexar(self, registro):
+        self.secuencia += 1
+        registro['seq'] = self.secuencia
+        if self._journal is None:
+            self._asegurar_directorio()
+            self._journal = open(self.archivo_journal, 'a', encoding='utf-8')
+        self._journal.write(json.dumps(registro) + "\n")
+        if not self._en_lote:
+            self._vaciar_journal()
+        self.operaciones_pendientes += 1
+
+    def _vaciar_journal(self):
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def _cargar_generacion(self, generacion):
+        """
+        Estado de una generación: su snapshot más los journals de esa generación
+        y de todas las posteriores (cada snapshot equivale al anterior más su journal).
+        """
+        snapshot = self._ruta_generacion(self.archivo_snapshot, generacion)
+        productos, secuencia, ultimo_id = self._leer_snapshot(snapshot)
+        # Estado indexado por ID; los productos de versiones anteriores sin ID
+        # reciben una clave provisional (el controlador luego les asigna uno)
+        estado = {}
+        for posicion, datos in enumerate(productos):
+            estado[datos.get('id') or ('posicion', posicion)] = datos
+        self.secuencia, self.ultimo_id = secuencia, ultimo_id
+        self.operaciones_pendientes = 0
+        for g in range(generacion, -1, -1):
+            for registro in self._leer_journal(self._ruta_generacion(self.archivo_journal, g)):
+                if registro['seq'] <= self.secuencia:
+                    # Ya incluido en el snapshot (compactación interrumpida)
+                    continue
+                if registro['seq'] != self.secuencia + 1:
+                    raise ValueError(f"faltan registros del journal antes de {registro['seq']}")
+                self._aplicar(estado, registro)
+                self.secuencia = registro['seq']
+                self.operaciones_pendientes += 1
+        return list(estado.values())
+
+    def _escribir_snapshot(self, archivo, productos):
+        """
+        Escribe el snapshot en el formato de este almacenamiento. El checksum
+        cubre el texto de la lista de productos, que va al final del archivo.
+        """
+        texto_productos = json.dumps(productos, indent=4)
+        cabecera = {
+            'secuencia': self.secuencia,
+            'ultimo_id': self.ultimo_id,
+            'sha256': hashlib.sha256(texto_productos.encode('utf-8')).hexdigest()
+        }
+        with open(archivo, 'w', encoding='utf-8') as f:
+            f.write("{\n")
+            for clave, valor in cabecera.items():
+                f.write(f"    {json.dumps(clave)}: {json.dumps(valor)},\n")
+            f.write('    "productos": ' + texto_productos + "\n}\n")
+
+    def _leer_snapshot(self, archivo):
+        """Devuelve (productos, secuencia, ultimo_id) del snapshot, o vacío si no existe."""
+        if not os.path.exists(archivo):
+            return [], 0, 0
+        with open(archivo, 'r', encoding='utf-8') as f:
+            texto = f.read()
+        datos = json.loads(texto)
+        # Formato anterior: lista simple de productos
+        if isinstance(datos, list):
+            return datos, 0, 0
+        if 'sha256' in datos:
+            # La lista de productos es lo último del archivo (ver _escribir_snapshot)
+            inicio = texto.index('"productos": ') + len('"productos": ')
+            fin = texto.rindex("}")
+            texto_productos = texto[inicio:fin].rstrip()
+            if hashlib.sha256(texto_productos.encode('utf-8')).hexdigest() != datos['sha256']:
+                raise ValueError("el checksum del snapshot no coincide")
+        return datos['productos'], datos.get('secuencia', 0), datos.get('ultimo_id', 0)
+
+    def _leer_journal(self, archivo):
+        """
+        Lee los registros de un journal. Si la última línea quedó incompleta
+        (cierre inesperado a mitad de escritura) se descarta y se recorta el
+        archivo para que los siguientes registros no queden pegados a ella.
+        """
+        if not os.path.exists(archivo):
+            return []
+        registros = []
+        fin_valido = 0
+        with open(archivo, 'rb') as f:
+            for linea in f:
+                if not linea.endswith(b"\n"):
+                    break
+                try:
+                    registros.append(json.loads(linea.decode('utf-8')))
+                except ValueError:
+                    break
+                fin_valido += len(linea)
+        if fin_valido < os.path.getsize(archivo):
+            print(f"Journal incompleto, se descartan los registros desde el byte {fin_valido}")
+            with open(archivo, 'r+b') as f:
+                f.truncate(fin_valido)
+        return registros
+
+    def _aplicar(self, estado, registro):
+        op = registro['op']
+        if op == 'alta':
+            datos = registro['producto']
+            if datos.get('id'):
+                self.ultimo_id = max(self.ultimo_id, datos['id'])
+            estado[datos.get('id') or ('seq', registro['seq'])] = datos
+            return
+        if op == 'actualizacion':
+            estado[registro['id']] = registro['producto']
+        elif op == 'baja':
+            del estado[registro['id']]
+
+    @staticmethod
+    def _ruta_generacion(archivo, generacion):
+        return archivo if generacion == 0 else f"{archivo}.{generacion}"
+
+    def _rotar_generaciones(self):
+        """Corre cada generación un lugar (la más vieja se descarta) y deja libre la actual."""
+        if not self.generaciones:
+            return
+        for archivo in (self.archivo_snapshot, self.archivo_journal):
+            for generacion in range(self.generaciones, 0, -1):
+                origen = self._ruta_generacion(archivo, generacion - 1)
+                destino = self._ruta_generacion(archivo, generacion)
+                if os.path.exists(origen):
+                    os.replace(origen, destino)
+                elif os.path.exists(destino):
+                    # Sin origen el lugar queda vacío: snapshot y journal siguen apareados
+                    os.remove(destino)
+
+    def _apartar_danado(self):
+        """
+        Renombra el snapshot actual dañado a .danado para que la próxima
+        compactación no lo rote en lugar de una generación válida.
+        """
+        if os.path.exists(self.archivo_snapshot):
+            os.replace(self.archivo_snapshot, self.archivo_snapshot + ".danado")
+
+    @staticmethod
+    def _sincronizar(archivo):
+        """Fuerza a disco el contenido de un archivo ya escrito."""
+        with open(archivo, 'r+b') as f:
+            os.fsync(f.fileno())
+
+    def _sincronizar_directorio(self):
+        """Fuerza a disco los renombres (solo donde el sistema lo permite)."""
+        if not hasattr(os, 'O_DIRECTORY'):
+            return
+        descriptor = os.open(os.path.dirname(self.archivo_snapshot) or ".", os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+
+    def _asegurar_directorio(self):
+        directorio = os.path.dirname(self.archivo_snapshot)
+        if directorio and not os.path.exists(directorio):
+            os.makedirs(directorio)
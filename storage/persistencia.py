@@ -0,0 +1,125 @@
+import queue
+import threading
+import time
+from utils.instrumentacion import medido, contar
+
+
+class TrabajadorPersistencia:
+    """
+    Hilo que aplica en segundo plano las escrituras de un almacenamiento.
+
+    El controlador encola cada alta, actualización o baja y las compactaciones;
+    el hilo toma todo lo pendiente de una vez y lo escribe como un solo lote.
+    Si en el lote hay varias compactaciones solo se hace la última: su snapshot
+    ya incluye lo de las anteriores. Los registros del journal se escriben
+    todos, porque las generaciones de respaldo se reconstruyen con ellos.
+
+    Los resultados se publican en una cola de avisos que la interfaz consulta
+    periódicamente (nunca se toca Tk desde este hilo).
+    """
+
+    def __init__(self, almacen, capacidad=1000):
+        """
+        Args:
+            almacen: Almacenamiento cuyas escrituras se delegan al hilo
+            capacidad (int): Máximo de operaciones en espera; al llenarse,
+                quien encola espera a que el hilo se ponga al día
+        """
+        self.almacen = almacen
+        self._cola = queue.Queue(maxsize=capacidad)
+        self._avisos = queue.Queue()
+        # Compactaciones encoladas que el hilo todavía no terminó
+        self._compactaciones = 0
+        self._cerrojo = threading.Lock()
+        self._hilo = threading.Thread(target=self._ejecutar, name="persistencia", daemon=True)
+        self._hilo.start()
+
+    def registrar(self, registrar, *args):
+        """Encola una escritura en el journal (p. ej. almacen.registrar_alta y sus argumentos)."""
+        self._cola.put(('registrar', registrar, args))
+
+    def registrar_lote(self, operaciones):
+        """Encola varias escrituras [(registrar, args), ...] que se hacen juntas, en un mismo lote."""
+        self._cola.put(('lote', operaciones))
+
+    def compactar(self, productos):
+        """Encola una compactación con la lista de productos (objetos Producto) a guardar."""
+        with self._cerrojo:
+            self._compactaciones += 1
+        self._cola.put(('compactar', productos))
+
+    @property
+    def compactacion_pendiente(self):
+        """True desde que se encola una compactación hasta que el hilo la termina (o falla)."""
+        return self._compactaciones > 0
+
+    def esperar(self):
+        """Bloquea hasta que todo lo encolado esté escrito."""
+        self._cola.join()
+
+    def cerrar(self):
+        """Escribe lo pendiente, detiene el hilo y cierra el almacenamiento."""
+        self._cola.put(None)
+        self._hilo.join()
+        self.almacen.cerrar()
+
+    def obtener_avisos(self):
+        """
+        Devuelve (y descarta) los avisos publicados desde la última consulta:
+        tuplas ("guardado", segundos que tomó el lote) o ("error", mensaje).
+        """
+        avisos = []
+        while True:
+            try:
+                avisos.append(self._avisos.get_nowait())
+            except queue.Empty:
+                return avisos
+
+    def _ejecutar(self):
+        while True:
+            lote = [self._cola.get()]
+            while True:
+                try:
+                    lote.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+            terminar = None in lote
+            try:
+                self._escribir([tarea for tarea in lote if tarea is not None])
+            finally:
+                compactaciones = sum(1 for tarea in lote if tarea is not None and tarea[0] == 'compactar')
+                if compactaciones:
+                    with self._cerrojo:
+                        self._compactaciones -= compactaciones
+                for _ in lote:
+                    self._cola.task_done()
+            if terminar:
+                return
+
+    @medido("persistencia.escribir")
+    def _escribir(self, lote):
+        if not lote:
+            return
+        contar("persistencia.tareas", len(lote))
+        # Solo cuenta la última compactación del lote
+        ultima = None
+        for posicion, tarea in enumerate(lote):
+            if tarea[0] == 'compactar':
+                ultima = posicion
+        inicio = time.perf_counter()
+        try:
+            with self.almacen.lote():
+                for posicion, tarea in enumerate(lote):
+                    if tarea[0] == 'registrar':
+                        _, registrar, args = tarea
+                        registrar(*args)
+                    elif tarea[0] == 'lote':
+                        for registrar, args in tarea[1]:
+                            registrar(*args)
+                    elif posicion == ultima:
+                        self.almacen.compactar([p.to_dict() for p in tarea[1]])
+        except Exception as e:
+            print(f"Error al guardar productos: {e}")
+            self._avisos.put(('error', f"Error al guardar productos: {e}"))
+            return
+        self._avisos.put(('guardado', time.perf_counter() - inicio))
@@ -0,0 +1,159 @@
+import array
+import hashlib
+import io
+import json
+import os
+import struct
+import sys
+
+from storage.journal import AlmacenamientoJournal
+
+
+class AlmacenamientoBinario(AlmacenamientoJournal):
+    """
+    Variante del almacenamiento snapshot + journal cuyo snapshot es un archivo
+    binario por columnas en lugar de JSON.
+
+    Los campos numéricos se guardan como arreglos contiguos (`array`) que se
+    leen de una sola vez, y los nombres y fechas como tablas de textos
+    distintos a las que cada producto apunta por índice. El JSON sigue siendo
+    el formato de intercambio: ver `exportar_json` e `importar_json`.
+
+    Formato (little-endian):
+        cabecera: magia, versión, cantidad, secuencia, último ID y SHA-256 del
+        resto del archivo
+        tabla de textos: longitud (uint32) + JSON {"nombres": [...], "fechas": [...]}
+        columnas de `cantidad` elementos: id, índice de nombre, índice de fecha,
+        cantidad (int64) y precio_total, precio_venta_usuario (float64)
+    """
+
+    MAGIA = b"PAPB"
+    VERSION = 2
+    _CABECERA = struct.Struct("<4sHIqq32s")
+    _LONGITUD = struct.Struct("<I")
+    # (campo, código de tipo de array)
+    _COLUMNAS = (
+        ('id', 'q'),
+        ('nombre', 'q'),
+        ('fecha', 'q'),
+        ('cantidad', 'q'),
+        ('precio_total', 'd'),
+        ('precio_venta_usuario', 'd'),
+    )
+
+    def __init__(self, archivo_snapshot, umbral_compactacion=1000, generaciones=3):
+        """
+        Args:
+            archivo_snapshot (str): Ruta del snapshot binario (p. ej. db/productos.bin)
+            umbral_compactacion (int): Operaciones en el journal antes de compactar
+            generaciones (int): Generaciones de respaldo que se conservan
+        """
+        # Journal propio para no mezclarse con el del snapshot JSON
+        super().__init__(archivo_snapshot, umbral_compactacion,
+                         archivo_journal=archivo_snapshot + ".journal",
+                         generaciones=generaciones)
+
+    def importar_json(self, archivo_json):
+        """
+        Importa de una sola vez el historial de un almacenamiento JSON
+        (snapshot más journal). Devuelve la cantidad de productos importados.
+        """
+        origen = AlmacenamientoJournal(archivo_json)
+        productos = origen.cargar()
+        self.ultimo_id = max(self.ultimo_id, origen.ultimo_id)
+        self.compactar(productos)
+        return len(productos)
+
+    def exportar_json(self, archivo_json):
+        """Escribe el historial actual (snapshot más journal) como snapshot JSON."""
+        productos = self.cargar()
+        destino = AlmacenamientoJournal(archivo_json)
+        destino.ultimo_id = self.ultimo_id
+        destino.compactar(productos)
+        return len(productos)
+
+    def _escribir_snapshot(self, archivo, productos):
+        nombres = {}
+        fechas = {}
+        columnas = {campo: array.array(tipo) for campo, tipo in self._COLUMNAS}
+        for datos in productos:
+            columnas['id'].append(datos.get('id') or 0)
+            columnas['nombre'].append(nombres.setdefault(datos['nombre'], len(nombres)))
+            columnas['fecha'].append(fechas.setdefault(datos['fecha'], len(fechas)))
+            columnas['cantidad'].append(datos['cantidad'])
+            columnas['precio_total'].append(datos['precio_total'])
+            columnas['precio_venta_usuario'].append(datos['precio_venta_usuario'])
+        textos = json.dumps({'nombres': list(nombres), 'fechas': list(fechas)}).encode('utf-8')
+        cuerpo = io.BytesIO()
+        cuerpo.write(self._LONGITUD.pack(len(textos)))
+        cuerpo.write(textos)
+        for campo, _ in self._COLUMNAS:
+            columna = columnas[campo]
+            if sys.byteorder == 'big':
+                columna.byteswap()
+            cuerpo.write(columna.tobytes())
+        cuerpo = cuerpo.getvalue()
+        with open(archivo, 'wb') as f:
+            f.write(self._CABECERA.pack(self.MAGIA, self.VERSION, len(productos),
+                                        self.secuencia, self.ultimo_id,
+                                        hashlib.sha256(cuerpo).digest()))
+            f.write(cuerpo)
+
+    def _leer_snapshot(self, archivo):
+        if not os.path.exists(archivo):
+            return [], 0, 0
+        with open(archivo, 'rb') as f:
+            contenido = f.read()
+        magia, version = struct.unpack_from("<4sH", contenido)
+        if magia != self.MAGIA or version != self.VERSION:
+            raise ValueError(f"{archivo} no es un snapshot binario compatible")
+        _, _, cantidad, secuencia, ultimo_id, suma = self._CABECERA.unpack_from(contenido)
+        posicion = self._CABECERA.size
+        if hashlib.sha256(memoryview(contenido)[posicion:]).digest() != suma:
+            raise ValueError("el checksum del snapshot no coincide")
+        (longitud,) = self._LONGITUD.unpack_from(contenido, posicion)
+        posicion += self._LONGITUD.size
+        textos = json.loads(contenido[posicion:posicion + longitud].decode('utf-8'))
+        posicion += longitud
+        columnas = []
+        for _, tipo in self._COLUMNAS:
+            columna = array.array(tipo)
+            fin = posicion + cantidad * columna.itemsize
+            columna.frombytes(contenido[posicion:fin])
+            if sys.byteorder == 'big':
+                columna.byteswap()
+            columnas.append(columna)
+            posicion = fin
+        nombres = textos['nombres']
+        fechas = textos['fechas']
+        productos = [
+            {
+                'id': id_producto or None,
+                'nombre': nombres[nombre],
+                'precio_total': precio_total,
+                'cantidad': unidades,
+                'precio_venta_usuario': precio_venta,
+                'fecha': fechas[fecha]
+            }
+            for id_producto, nombre, fecha, unidades, precio_total, precio_venta in zip(*columnas)
+        ]
+        return productos, secuencia, ultimo_id
+
+
+if __name__ == "__main__":
+    # Uso: python -m storage.snapshot_binario importar|exportar [db/productos.json] [db/productos.bin]
+    accion = sys.argv[1] if len(sys.argv) > 1 else "importar"
+    archivo_json = sys.argv[2] if len(sys.argv) > 2 else "db/productos.json"
+    archivo_bin = sys.argv[3] if len(sys.argv) > 3 else "db/productos.bin"
+    almacen = AlmacenamientoBinario(archivo_bin)
+    try:
+        if accion == "importar":
+            cantidad = almacen.importar_json(archivo_json)
+            print(f"Se importaron {cantidad} productos a {archivo_bin}")
+        elif accion == "exportar":
+            cantidad = almacen.exportar_json(archivo_json)
+            print(f"Se exportaron {cantidad} productos a {archivo_json}")
+        else:
+            print(f"Acción desconocida: {accion} (use importar o exportar)")
+    finally:
+        almacen.cerrar()
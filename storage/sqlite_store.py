@@ -0,0 +1,263 @@
+import contextlib
+import os
+import sqlite3
+import sys
+from collections import namedtuple
+
+from storage.journal import AlmacenamientoJournal
+from utils.normalizacion import normalizar_nombre
+
+# Totales de un día o rango calculados por la base (mismos campos que ResumenFecha)
+ResumenConsulta = namedtuple('ResumenConsulta', ['total_inversion', 'ganancia_total', 'cantidad', 'tipos'])
+
+# Límites para rangos de fechas abiertos (las fechas son textos YYYY-MM-DD)
+_PRIMERA_FECHA = "0000-00-00"
+_ULTIMA_FECHA = "9999-99-99"
+
+
+class AlmacenamientoSQLite:
+    """
+    Almacenamiento de productos en una base SQLite embebida.
+
+    Mantiene índices sobre `fecha` y sobre el nombre normalizado (sin tildes ni mayúsculas) para
+    consultas directas sobre la base: los totales por fecha, los conteos y la
+    búsqueda por nombre se resuelven con SQL (SUM, COUNT(DISTINCT), instr) sin
+    cargar el historial, así que responden aunque la carga no haya terminado.
+    """
+
+    # El controlador puede delegarle las consultas (ver ProductoController._almacen_consultas)
+    consultas_indexadas = True
+
+    _INSERTAR = (
+        "INSERT INTO productos (id, nombre, nombre_min, precio_total, cantidad, "
+        "precio_venta_usuario, fecha) VALUES (?, ?, ?, ?, ?, ?, ?)"
+    )
+
+    def __init__(self, archivo_db):
+        """
+        Args:
+            archivo_db (str): Ruta del archivo SQLite (p. ej. db/productos.db)
+        """
+        self.archivo_db = archivo_db
+        directorio = os.path.dirname(archivo_db)
+        if directorio and not os.path.exists(directorio):
+            os.makedirs(directorio)
+        # La conexión puede usarla el hilo de persistencia (nunca dos hilos a la vez)
+        self.conexion = sqlite3.connect(archivo_db, check_same_thread=False)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute("PRAGMA synchronous=NORMAL")
+        self._crear_esquema()
+        # Conexión solo para consultas: en modo WAL lee lo ya confirmado mientras
+        # la carga o el hilo de persistencia usan la principal
+        self._lectura = sqlite3.connect(archivo_db, check_same_thread=False)
+        # Mayor ID asignado alguna vez (AUTOINCREMENT no reutiliza IDs eliminados)
+        self.ultimo_id = 0
+        self._en_lote = False
+
+    def _crear_esquema(self):
+        with self.conexion:
+            self.conexion.execute("""
+                CREATE TABLE IF NOT EXISTS productos (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    nombre TEXT NOT NULL,
+                    nombre_min TEXT NOT NULL,
+                    precio_total REAL NOT NULL,
+                    cantidad INTEGER NOT NULL,
+                    precio_venta_usuario REAL NOT NULL,
+                    fecha TEXT NOT NULL
+                )
+            """)
+            self.conexion.execute(
+                "CREATE INDEX IF NOT EXISTS idx_productos_fecha ON productos(fecha)"
+            )
+            self.conexion.execute(
+                "CREATE INDEX IF NOT EXISTS idx_productos_nombre_min ON productos(nombre_min)"
+            )
+
+    def cargar(self):
+        """Devuelve todos los productos (como diccionarios) en orden de registro."""
+        filas = self.conexion.execute(
+            "SELECT id, nombre, precio_total, cantidad, precio_venta_usuario, fecha "
+            "FROM productos ORDER BY id"
+        ).fetchall()
+        secuencia = self.conexion.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'productos'"
+        ).fetchone()
+        self.ultimo_id = secuencia[0] if secuencia else 0
+        return [self._fila_a_dict(fila) for fila in filas]
+
+    def esta_vacio(self):
+        """Indica si la base todavía no tiene productos."""
+        return self.conexion.execute("SELECT 1 FROM productos LIMIT 1").fetchone() is None
+
+    def registrar_alta(self, datos):
+        """Inserta un producto nuevo con el ID asignado por el controlador."""
+        with self._transaccion():
+            self.conexion.execute(self._INSERTAR, self._dict_a_fila(datos))
+        self.ultimo_id = max(self.ultimo_id, datos['id'])
+
+    def registrar_actualizacion(self, id_producto, datos):
+        """Actualiza el producto con el ID dado."""
+        with self._transaccion():
+            self.conexion.execute(
+                "UPDATE productos SET nombre = ?, nombre_min = ?, precio_total = ?, "
+                "cantidad = ?, precio_venta_usuario = ?, fecha = ? WHERE id = ?",
+                self._dict_a_fila(datos)[1:] + (id_producto,)
+            )
+
+    def registrar_baja(self, id_producto):
+        """Elimina el producto con el ID dado."""
+        with self._transaccion():
+            self.conexion.execute("DELETE FROM productos WHERE id = ?", (id_producto,))
+
+    @contextlib.contextmanager
+    def lote(self):
+        """Agrupa varios cambios en una sola transacción."""
+        self._en_lote = True
+        try:
+            with self.conexion:
+                yield
+        finally:
+            self._en_lote = False
+
+    @contextlib.contextmanager
+    def _transaccion(self):
+        """Transacción propia de cada cambio, salvo dentro de un lote."""
+        if self._en_lote:
+            yield
+            return
+        with self.conexion:
+            yield
+
+    def necesita_compactacion(self):
+        """SQLite administra su propio archivo: nunca hace falta compactar."""
+        return False
+
+    def compactar(self, productos):
+        """Reemplaza el contenido completo de la tabla en una sola transacción."""
+        with self._transaccion():
+            self.conexion.execute("DELETE FROM productos")
+            self.conexion.executemany(self._INSERTAR, (self._dict_a_fila(p) for p in productos))
+
+    def importar_json(self, archivo_json):
+        """
+        Importa de una sola vez el historial de un almacenamiento JSON
+        (snapshot más journal). Devuelve la cantidad de productos importados.
+        """
+        productos = AlmacenamientoJournal(archivo_json).cargar()
+        with self.conexion:
+            # Los productos sin ID (formato anterior) reciben uno de AUTOINCREMENT
+            self.conexion.executemany(self._INSERTAR, (self._dict_a_fila(p) for p in productos))
+        return len(productos)
+
+    def resumen(self, desde, hasta):
+        """Totales de los productos entre `desde` y `hasta` (inclusive, YYYY-MM-DD)."""
+        fila = self._lectura.execute(
+            "SELECT COALESCE(SUM(precio_total), 0), "
+            "COALESCE(SUM(precio_venta_usuario * cantidad - precio_total), 0), "
+            "COUNT(*), COUNT(DISTINCT nombre_min) "
+            "FROM productos WHERE fecha BETWEEN ? AND ?",
+            (desde, hasta)
+        ).fetchone()
+        return ResumenConsulta(*fila)
+
+    def contar(self, desde=None, hasta=None):
+        """Cantidad de productos entre `desde` y `hasta` (inclusive; sin límites, todos)."""
+        if desde is None and hasta is None:
+            return self._lectura.execute("SELECT COUNT(*) FROM productos").fetchone()[0]
+        return self._lectura.execute(
+            "SELECT COUNT(*) FROM productos WHERE fecha BETWEEN ? AND ?",
+            (desde or _PRIMERA_FECHA, hasta or _ULTIMA_FECHA)
+        ).fetchone()[0]
+
+    def contar_tipos(self):
+        """Cantidad de nombres distintos (normalizados) en todo el historial."""
+        return self._lectura.execute(
+            "SELECT COUNT(DISTINCT nombre_min) FROM productos").fetchone()[0]
+
+    def buscar(self, termino, limite=None):
+        """
+        Productos (diccionarios) cuyo nombre normalizado contiene el término, con el
+        mismo orden de relevancia que IndiceNombres: coincidencia exacta, prefijo,
+        inicio de palabra y luego posición (a igualdad, el nombre más corto primero).
+        La subcadena se busca recorriendo el índice de nombres, no la tabla.
+        """
+        filas = self._lectura.execute(
+            "SELECT id, nombre, precio_total, cantidad, precio_venta_usuario, fecha FROM ("
+            " SELECT id AS id_coincidente, instr(nombre_min, :t) AS posicion"
+            " FROM productos INDEXED BY idx_productos_nombre_min"
+            " WHERE instr(nombre_min, :t) > 0"
+            ") JOIN productos ON productos.id = id_coincidente "
+            "ORDER BY CASE"
+            " WHEN productos.nombre_min = :t THEN 0"
+            " WHEN posicion = 1 THEN 1"
+            " WHEN substr(productos.nombre_min, posicion - 1, 1) = ' ' THEN 2"
+            " ELSE 3 END, posicion, length(productos.nombre_min), productos.nombre_min, productos.id "
+            "LIMIT :limite",
+            {'t': normalizar_nombre(termino), 'limite': -1 if limite is None else limite}
+        ).fetchall()
+        return [self._fila_a_dict(fila) for fila in filas]
+
+    def productos_de(self, fecha):
+        """Productos (diccionarios) de una fecha, ordenados por ID."""
+        filas = self._lectura.execute(
+            "SELECT id, nombre, precio_total, cantidad, precio_venta_usuario, fecha "
+            "FROM productos WHERE fecha = ? ORDER BY id",
+            (fecha,)
+        ).fetchall()
+        return [self._fila_a_dict(fila) for fila in filas]
+
+    def contar_nombre(self, termino):
+        """Cantidad de productos cuyo nombre normalizado contiene el término."""
+        return self._lectura.execute(
+            "SELECT COUNT(*) FROM productos INDEXED BY idx_productos_nombre_min "
+            "WHERE instr(nombre_min, ?) > 0",
+            (normalizar_nombre(termino),)
+        ).fetchone()[0]
+
+    def cerrar(self):
+        """Cierra las conexiones con la base."""
+        self._lectura.close()
+        self.conexion.close()
+
+    @staticmethod
+    def _dict_a_fila(datos):
+        return (
+            datos.get('id'),
+            datos['nombre'],
+            normalizar_nombre(datos['nombre']),
+            datos['precio_total'],
+            datos['cantidad'],
+            datos['precio_venta_usuario'],
+            datos['fecha']
+        )
+
+    @staticmethod
+    def _fila_a_dict(fila):
+        return {
+            'id': fila[0],
+            'nombre': fila[1],
+            'precio_total': fila[2],
+            'cantidad': fila[3],
+            'precio_venta_usuario': fila[4],
+            'fecha': fila[5]
+        }
+
+
+def migrar_json_a_sqlite(archivo_json, archivo_sqlite):
+    """Migra un historial JSON existente a una base SQLite vacía."""
+    almacen = AlmacenamientoSQLite(archivo_sqlite)
+    try:
+        if not almacen.esta_vacio():
+            raise ValueError(f"La base {archivo_sqlite} ya contiene productos")
+        return almacen.importar_json(archivo_json)
+    finally:
+        almacen.cerrar()
+
+
+if __name__ == "__main__":
+    # Uso: python -m storage.sqlite_store [db/productos.json] [db/productos.db]
+    origen = sys.argv[1] if len(sys.argv) > 1 else "db/productos.json"
+    destino = sys.argv[2] if len(sys.argv) > 2 else "db/productos.db"
+    cantidad = migrar_json_a_sqlite(origen, destino)
+    print(f"Se importaron {cantidad} productos a {destino}")
@@ -0,0 +1,100 @@
+import csv
+import os
+
+COLUMNAS_EXPORTACION = (
+    "ID", "Nombre", "Precio Total", "Cantidad", "Precio Unitario",
+    "Precio Venta", "Ganancia U.", "Ganancia Total", "Fecha"
+)
+
+# Cada cuántas filas se informa el progreso y se revisa la cancelación
+PASO_PROGRESO = 500
+
+
+class ExportacionCancelada(Exception):
+    """Se lanza cuando el usuario cancela una exportación en curso."""
+    pass
+
+
+def filas_productos(productos):
+    """Genera, una a una, las filas de exportación de los productos."""
+    for p in productos:
+        yield (
+            p.id,
+            p.nombre,
+            p.precio_total,
+            p.cantidad,
+            p.precio_unitario,
+            p.precio_venta_usuario,
+            p.ganancia_unitaria,
+            p.ganancia_total,
+            p.fecha
+        )
+
+
+def exportar_productos(archivo, productos, progreso=None, cancelado=None):
+    """
+    Exporta productos a CSV o a Excel según la extensión del archivo, sin
+    armar el documento completo en memoria.
+
+    Args:
+        archivo (str): Ruta de destino (.csv o .xlsx)
+        productos (iterable): Productos a exportar (se recorren una sola vez)
+        progreso (callable, optional): Recibe la cantidad de filas escritas
+        cancelado (callable, optional): Devuelve True si hay que detenerse
+
+    Returns:
+        int: Cantidad de filas exportadas
+
+    Raises:
+        ExportacionCancelada: Si `cancelado()` devolvió True (el archivo parcial se borra)
+    """
+    filas = _con_progreso(filas_productos(productos), progreso, cancelado)
+    try:
+        if archivo.lower().endswith(".csv"):
+            return _exportar_csv(archivo, filas)
+        return _exportar_xlsx(archivo, filas)
+    except ExportacionCancelada:
+        if os.path.exists(archivo):
+            os.remove(archivo)
+        raise
+
+
+def _con_progreso(filas, progreso, cancelado):
+    escritas = 0
+    for fila in filas:
+        yield fila
+        escritas += 1
+        if escritas % PASO_PROGRESO == 0:
+            if cancelado is not None and cancelado():
+                raise ExportacionCancelada()
+            if progreso is not None:
+                progreso(escritas)
+    if progreso is not None:
+        progreso(escritas)
+
+
+def _exportar_csv(archivo, filas):
+    escritas = 0
+    # utf-8-sig para que Excel reconozca las tildes al abrir el CSV
+    with open(archivo, 'w', newline='', encoding='utf-8-sig') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(COLUMNAS_EXPORTACION)
+        for fila in filas:
+            escritor.writerow(fila)
+            escritas += 1
+    return escritas
+
+
+def _exportar_xlsx(archivo, filas):
+    # openpyxl es pesado de importar: solo se carga al exportar a Excel
+    import openpyxl
+    # Modo de solo escritura: las filas se vuelcan al archivo sin quedar en memoria
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Historial")
+    ws.append(COLUMNAS_EXPORTACION)
+    escritas = 0
+    for fila in filas:
+        ws.append(fila)
+        escritas += 1
+    wb.save(archivo)
+    return escritas
@@ -1,16 +1,40 @@
+import functools
+
+# Formato colombiano: punto para los miles y coma para los decimales,
+# igual que en los campos de precio del formulario
+SEPARADOR_MILES = "."
+SEPARADOR_DECIMAL = ","
+_A_FORMATO_LOCAL = str.maketrans({",": SEPARADOR_MILES, ".": SEPARADOR_DECIMAL})
+
+# Los precios se repiten mucho en el historial: se recuerdan los más usados
+@functools.lru_cache(maxsize=8192)
 def formatear_pesos(valor):
-    """Formatea un valor numérico a formato de pesos."""
-    return f"${valor:,.2f}"
+    """Formatea un valor numérico a formato de pesos ($1.500.000,00)."""
+    return f"${valor:,.2f}".translate(_A_FORMATO_LOCAL)
 
+@functools.lru_cache(maxsize=1024)
 def formatear_numero(valor):
     """Formatea un número agregando puntos cada 3 dígitos."""
     if valor is None or valor == "":
         return ""
     # Eliminar puntos existentes y convertir a string
-    valor_str = str(valor).replace(".", "")
-    # Formatear con puntos cada 3 dígitos
-    partes = []
-    for i in range(len(valor_str), 0, -3):
-        inicio = max(0, i - 3)
-        partes.insert(0, valor_str[inicio:i])
-    return ".".join(partes) 
\ No newline at end of file
+    valor_str = str(valor).replace(SEPARADOR_MILES, "")
+    # Formatear con puntos cada 3 dígitos: el primer grupo lleva el resto
+    primero = len(valor_str) % 3 or 3
+    partes = [valor_str[:primero]]
+    partes.extend(valor_str[i:i + 3] for i in range(primero, len(valor_str), 3))
+    return SEPARADOR_MILES.join(partes)
+
+def formatear_columna(valores, formatear=formatear_pesos):
+    """
+    Formatea de una vez una columna de valores (por ejemplo los precios de las
+    filas visibles de una tabla). Los valores repetidos se formatean una sola vez.
+    """
+    formateados = {}
+    resultado = []
+    for valor in valores:
+        texto = formateados.get(valor)
+        if texto is None:
+            texto = formateados[valor] = formatear(valor)
+        resultado.append(texto)
+    return resultado
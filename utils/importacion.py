@@ -0,0 +1,93 @@
+import csv
+import re
+from utils.normalizacion import normalizar_nombre
+
+# Encabezado (normalizado) -> campo del producto. Incluye los nombres de las
+# columnas exportadas y los de to_dict(), así un archivo exportado se puede
+# volver a importar; las columnas que no figuran aquí se ignoran.
+CAMPOS_IMPORTACION = {
+    'nombre': 'nombre',
+    'producto': 'nombre',
+    'precio total': 'precio_total',
+    'cantidad': 'cantidad',
+    'precio venta': 'precio_venta_usuario',
+    'precio de venta': 'precio_venta_usuario',
+    'precio venta usuario': 'precio_venta_usuario',
+    'fecha': 'fecha',
+}
+
+CAMPOS_OBLIGATORIOS = ('nombre', 'precio_total', 'cantidad', 'precio_venta_usuario')
+
+# Números con puntos de miles (1.500.000), opcionalmente con decimales tras la coma
+_MILES = re.compile(r"^-?\d{1,3}(\.\d{3})+(,\d+)?$")
+
+
+def leer_filas(archivo):
+    """
+    Recorre un archivo CSV o Excel (.xlsx) fila por fila sin cargarlo entero.
+
+    Yields:
+        tuple: (número de fila en el archivo, dict campo -> valor crudo)
+
+    Raises:
+        ValueError: Si el encabezado no tiene las columnas obligatorias
+    """
+    if archivo.lower().endswith((".xlsx", ".xlsm")):
+        filas = _filas_xlsx(archivo)
+    else:
+        filas = _filas_csv(archivo)
+    encabezado = next(filas, None)
+    if encabezado is None:
+        return
+    campos = [
+        CAMPOS_IMPORTACION.get(normalizar_nombre(str(c or "")).replace("_", " "))
+        for c in encabezado
+    ]
+    faltantes = [c for c in CAMPOS_OBLIGATORIOS if c not in campos]
+    if faltantes:
+        raise ValueError("Faltan columnas obligatorias: " + ", ".join(faltantes))
+    for numero, fila in enumerate(filas, start=2):
+        if not any(v not in (None, "") for v in fila):
+            continue
+        yield numero, {campo: valor for campo, valor in zip(campos, fila) if campo}
+
+
+def convertir_numero(valor):
+    """
+    Convierte un valor de celda a número. Acepta números, "$1.500.000",
+    "1.500,50" y "1500.5".
+
+    Raises:
+        ValueError: Si el valor no es un número
+    """
+    if isinstance(valor, (int, float)):
+        return valor
+    texto = str(valor or "").replace("$", "").replace(" ", "").strip()
+    if _MILES.match(texto):
+        texto = texto.replace(".", "").replace(",", ".")
+    elif "," in texto:
+        texto = texto.replace(".", "").replace(",", ".")
+    return float(texto)
+
+
+def _filas_csv(archivo):
+    # utf-8-sig también lee los CSV exportados por la aplicación (con BOM)
+    with open(archivo, 'r', newline='', encoding='utf-8-sig') as f:
+        muestra = f.read(4096)
+        f.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=",;\t")
+        except csv.Error:
+            dialecto = csv.excel
+        yield from csv.reader(f, dialecto)
+
+
+def _filas_xlsx(archivo):
+    # openpyxl solo se importa al leer un Excel
+    import openpyxl
+    # Modo de solo lectura: las filas se leen a medida que se recorren
+    wb = openpyxl.load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        yield from wb.active.iter_rows(values_only=True)
+    finally:
+        wb.close()
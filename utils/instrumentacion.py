@@ -0,0 +1,189 @@
+"""
+Instrumentación de los caminos críticos (E/S, búsquedas, agregados, tabla).
+
+Está apagada por defecto: cada función medida solo paga una consulta a una
+variable global. Se enciende con la variable de entorno
+PAPELERIA_INSTRUMENTACION=1 (y PAPELERIA_INSTRUMENTACION_LOG=<archivo> para
+anexar cada medición a un log) o desde la ventana de diagnóstico.
+"""
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+# Mediciones por métrica sobre las que se calculan los percentiles
+VENTANA_PERCENTILES = 1000
+# Operaciones recientes que se guardan para la ventana de diagnóstico
+MAXIMO_RECIENTES = 200
+
+# Resumen de una métrica; los tiempos están en segundos
+ResumenMetrica = namedtuple('ResumenMetrica', ['nombre', 'llamadas', 'total', 'p50', 'p90', 'p99', 'maximo'])
+# Operación medida: hora (time.time()), nombre, duración en segundos e hilo
+Operacion = namedtuple('Operacion', ['hora', 'nombre', 'segundos', 'hilo'])
+
+_activa = False
+_bloqueo = threading.Lock()
+_metricas = {}
+_contadores = {}
+_recientes = deque(maxlen=MAXIMO_RECIENTES)
+_log = None
+
+
+class _Metrica:
+    __slots__ = ('llamadas', 'total', 'ventana')
+
+    def __init__(self):
+        self.llamadas = 0
+        self.total = 0.0
+        self.ventana = deque(maxlen=VENTANA_PERCENTILES)
+
+
+def activar(archivo_log=None):
+    """
+    Enciende la instrumentación.
+
+    Args:
+        archivo_log (str, optional): Archivo al que se anexa cada medición (una línea JSON)
+    """
+    global _activa, _log
+    with _bloqueo:
+        if _log is not None:
+            _log.close()
+            _log = None
+        if archivo_log:
+            try:
+                _log = open(archivo_log, 'a', encoding='utf-8', buffering=1)
+            except OSError as e:
+                print(f"Error al abrir el log de instrumentación: {e}")
+        _activa = True
+
+
+def desactivar():
+    """Apaga la instrumentación y cierra el log; las métricas se conservan."""
+    global _activa, _log
+    with _bloqueo:
+        _activa = False
+        if _log is not None:
+            _log.close()
+            _log = None
+
+
+def esta_activa():
+    return _activa
+
+
+def reiniciar():
+    """Borra las métricas, contadores y operaciones recientes."""
+    with _bloqueo:
+        _metricas.clear()
+        _contadores.clear()
+        _recientes.clear()
+
+
+def registrar(nombre, segundos):
+    """Registra la duración de una operación."""
+    operacion = Operacion(time.time(), nombre, segundos, threading.current_thread().name)
+    with _bloqueo:
+        metrica = _metricas.get(nombre)
+        if metrica is None:
+            metrica = _metricas[nombre] = _Metrica()
+        metrica.llamadas += 1
+        metrica.total += segundos
+        metrica.ventana.append(segundos)
+        _recientes.append(operacion)
+        if _log is not None:
+            try:
+                _log.write(json.dumps(operacion._asdict(), ensure_ascii=False) + "\n")
+            except (OSError, ValueError) as e:
+                print(f"Error al escribir el log de instrumentación: {e}")
+
+
+def contar(nombre, cantidad=1):
+    """Suma `cantidad` a un contador (no hace nada si la instrumentación está apagada)."""
+    if not _activa:
+        return
+    with _bloqueo:
+        _contadores[nombre] = _contadores.get(nombre, 0) + cantidad
+
+
+def medido(nombre):
+    """
+    Decorador que mide la duración de cada llamada a la función con el nombre dado.
+
+    Ejemplo:
+        @medido("controlador.buscar_por_nombre")
+        def buscar_por_nombre(self, termino): ...
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not _activa:
+                return funcion(*args, **kwargs)
+            inicio = time.perf_counter()
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                registrar(nombre, time.perf_counter() - inicio)
+        return envoltura
+    return decorador
+
+
+@contextlib.contextmanager
+def medir(nombre):
+    """Mide la duración de un bloque: `with medir("vista.exportar"): ...`"""
+    if not _activa:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar(nombre, time.perf_counter() - inicio)
+
+
+def _percentil(ordenados, fraccion):
+    return ordenados[min(len(ordenados) - 1, int(fraccion * len(ordenados)))]
+
+
+def resumen():
+    """Devuelve un ResumenMetrica por métrica, de la de mayor tiempo total a la menor."""
+    with _bloqueo:
+        datos = [(nombre, m.llamadas, m.total, sorted(m.ventana)) for nombre, m in _metricas.items()]
+    resumenes = [
+        ResumenMetrica(nombre, llamadas, total, _percentil(ordenados, 0.5),
+                       _percentil(ordenados, 0.9), _percentil(ordenados, 0.99), ordenados[-1])
+        for nombre, llamadas, total, ordenados in datos
+    ]
+    resumenes.sort(key=lambda r: r.total, reverse=True)
+    return resumenes
+
+
+def contadores():
+    """Devuelve una copia de los contadores."""
+    with _bloqueo:
+        return dict(_contadores)
+
+
+def operaciones_recientes(cantidad=MAXIMO_RECIENTES):
+    """Devuelve las últimas `cantidad` operaciones medidas, de la más reciente a la más antigua."""
+    with _bloqueo:
+        recientes = list(_recientes)
+    return recientes[::-1][:cantidad]
+
+
+def exportar(archivo):
+    """Escribe en JSON el resumen, los contadores y las operaciones recientes."""
+    datos = {
+        'metricas': [r._asdict() for r in resumen()],
+        'contadores': contadores(),
+        'recientes': [o._asdict() for o in operaciones_recientes()]
+    }
+    with open(archivo, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, indent=4, ensure_ascii=False)
+
+
+if os.environ.get("PAPELERIA_INSTRUMENTACION", "") not in ("", "0"):
+    activar(os.environ.get("PAPELERIA_INSTRUMENTACION_LOG"))
@@ -0,0 +1,21 @@
+import functools
+import re
+import unicodedata
+
+_ESPACIOS = re.compile(r"\s+")
+
+# Los nombres se repiten mucho en el historial: se recuerda la clave de los más usados
+@functools.lru_cache(maxsize=4096)
+def normalizar_nombre(nombre):
+    """
+    Devuelve la clave de comparación de un nombre de producto: en minúsculas
+    (casefold), sin tildes ni diéresis y con los espacios colapsados.
+    La ñ se conserva para no confundir palabras como "año" y "ano".
+
+    Ejemplo: "  LÁPIZ   Negro " -> "lapiz negro"
+    """
+    descompuesto = unicodedata.normalize("NFD", nombre.casefold())
+    # La virgulilla de la ñ (U+0303 tras una n) es la única marca que se conserva
+    descompuesto = descompuesto.replace("ñ", "ñ")
+    sin_tildes = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return _ESPACIOS.sub(" ", sin_tildes).strip()
@@ -0,0 +1,81 @@
+import tkinter as tk
+
+
+def _centrar(ventana, geometria):
+    """
+    Ubica la ventana en el centro de la pantalla. El tamaño sale de la geometría
+    pedida ("400x300"), así no hace falta forzar antes el cálculo del diseño.
+    """
+    ancho, alto = (int(valor) for valor in geometria.split("x"))
+    x = (ventana.winfo_screenwidth() // 2) - (ancho // 2)
+    y = (ventana.winfo_screenheight() // 2) - (alto // 2)
+    ventana.geometry(f'{ancho}x{alto}+{x}+{y}')
+
+
+class Dialogo:
+    """
+    Ventana emergente que se construye una sola vez. Al cerrarla se oculta en
+    lugar de destruirse; `actualizar` (la función que devuelve su constructor)
+    carga los valores de cada apertura en los widgets ya creados.
+    """
+
+    def __init__(self, ventana):
+        self.ventana = ventana
+        self.actualizar = None
+
+    def ocultar(self, event=None):
+        """Suelta el foco exclusivo y oculta la ventana, conservando sus widgets."""
+        self.ventana.grab_release()
+        self.ventana.withdraw()
+
+
+class GestorDialogos:
+    """
+    Guarda una ventana por tipo de diálogo (clave) y la reutiliza: la primera
+    apertura crea la ventana y sus widgets, las siguientes solo actualizan los
+    valores y la vuelven a mostrar. Así abrir un diálogo es inmediato y no se
+    acumulan objetos de Tk por cada apertura.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._dialogos = {}
+
+    def mostrar(self, clave, titulo, geometria, construir, *args):
+        """
+        Muestra el diálogo `clave`, creándolo si todavía no existe.
+
+        Args:
+            clave (str): Identifica el tipo de diálogo
+            titulo (str): Título de la ventana
+            geometria (str): Tamaño de la ventana ("ancho x alto")
+            construir (callable): Recibe el Dialogo, crea sus widgets y devuelve la
+                función que actualiza sus valores
+            *args: Valores que se pasan a esa función en cada apertura
+
+        Returns:
+            Dialogo: El diálogo mostrado
+        """
+        dialogo = self._dialogos.get(clave)
+        if dialogo is None or not dialogo.ventana.winfo_exists():
+            dialogo = self._dialogos[clave] = self._crear(titulo, geometria, construir)
+        ventana = dialogo.ventana
+        ventana.deiconify()
+        ventana.lift()
+        dialogo.actualizar(*args)
+        ventana.grab_set()
+        return dialogo
+
+    def _crear(self, titulo, geometria, construir):
+        ventana = tk.Toplevel(self.root)
+        # Oculta mientras se arma, para que no se vea a medio construir
+        ventana.withdraw()
+        ventana.title(titulo)
+        ventana.configure(bg="#ffffff")
+        ventana.resizable(False, False)
+        ventana.transient(self.root)
+        _centrar(ventana, geometria)
+        dialogo = Dialogo(ventana)
+        ventana.protocol("WM_DELETE_WINDOW", dialogo.ocultar)
+        dialogo.actualizar = construir(dialogo)
+        return dialogo
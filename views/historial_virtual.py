@@ -0,0 +1,433 @@
+import bisect
+import itertools
+import time
+import tkinter as tk
+from tkinter import ttk
+from utils.instrumentacion import medido, contar
+
+
+def _id_de(producto):
+    return producto.id
+
+
+def _fecha_de(producto):
+    return producto.fecha
+
+
+class HistorialVirtual:
+    """
+    Tabla de historial virtualizada.
+
+    El Treeview solo contiene las filas que caben en pantalla; al desplazarse se
+    reutilizan esos mismos items cambiando sus valores. Los productos se agrupan
+    por fecha (cada grupo empieza con su fila separadora) y las celdas se
+    formatean recién cuando la fila entra en la vista.
+
+    Los productos se identifican por su ID persistente: los resaltados se
+    guardan por ID y el mapa ID -> item de las filas visibles permite
+    actualizar una fila en pantalla sin recorrer la tabla.
+
+    Con historiales grandes el modelo se reconstruye de a tramos cortos
+    programados con after (ver cargar), así la ventana sigue respondiendo.
+    """
+    # Tiempo máximo de cada tramo de la reconstrucción del modelo
+    PRESUPUESTO_CARGA_MS = 8
+
+    def __init__(self, master, columnas, formatear_fila, buffer=10, formatear_filas=None):
+        """
+        Args:
+            master: Widget contenedor de la tabla y su scrollbar
+            columnas (tuple): Nombres de las columnas
+            formatear_fila (callable): Recibe un producto y devuelve los valores de su fila
+            buffer (int): Filas por encima y por debajo de la vista que se formatean por adelantado
+            formatear_filas (callable, optional): Versión por lotes de formatear_fila (recibe
+                una lista de productos y devuelve la lista de valores); se usa al dibujar
+        """
+        self.formatear_fila = formatear_fila
+        self.formatear_filas = formatear_filas
+        self.buffer = buffer
+        self.columnas = columnas
+        self.tree = ttk.Treeview(master, columns=columnas, show="headings", height=15)
+        self.scrollbar = ttk.Scrollbar(master, orient=tk.VERTICAL, command=self._desplazar)
+        # Modelo: fechas ordenadas, productos de cada fecha y fila inicial de cada grupo
+        self._fechas = []
+        self._grupos = {}
+        self._inicios = []
+        self._total_filas = 0
+        self._desplazamiento = 0
+        self._visibles = 15
+        self._items = []
+        self._item_por_id = {}
+        self._cache = {}
+        self._etiquetas = {}
+        self._precarga = None
+        # Reconstrucción en curso: grupos por leer y grupos ya armados
+        self._carga = None
+        self._tarea_carga = None
+
+        self.tree.bind('<Configure>', self._al_redimensionar)
+        self.tree.bind('<MouseWheel>', self._rueda)
+        self.tree.bind('<Button-4>', lambda e: self._mover(-3))
+        self.tree.bind('<Button-5>', lambda e: self._mover(3))
+        self.tree.bind('<Prior>', lambda e: self._mover(-self._visibles, mantener_foco=True))
+        self.tree.bind('<Next>', lambda e: self._mover(self._visibles, mantener_foco=True))
+        self.tree.bind('<Up>', self._tecla_arriba)
+        self.tree.bind('<Down>', self._tecla_abajo)
+
+    def cargar(self, productos):
+        """
+        Reconstruye el modelo a partir de una secuencia de productos ordenada por
+        fecha y luego por ID (por ejemplo, los resultados de un filtro), que no debe
+        cambiar mientras dura la reconstrucción. Ver cargar_grupos.
+        """
+        self.cargar_grupos(
+            (fecha, list(grupo)) for fecha, grupo in itertools.groupby(productos, key=_fecha_de))
+
+    @medido("tabla.cargar")
+    def cargar_grupos(self, grupos):
+        """
+        Reconstruye el modelo a partir de pares (fecha, lista de productos ordenada
+        por ID) en orden de fecha (ver ProductoController.grupos_por_fecha), y
+        redibuja la vista. Los grupos se leen recién cuando se los necesita.
+
+        El primer tramo se hace enseguida; si no alcanza, el resto se programa con
+        after en tramos de a lo sumo PRESUPUESTO_CARGA_MS y mientras tanto se sigue
+        viendo la tabla anterior. Una nueva llamada cancela la reconstrucción en
+        curso, y un cambio puntual (insertar, quitar, resaltar...) la completa antes
+        de aplicarse.
+        """
+        self.cancelar_carga()
+        self._carga = {'grupos': iter(grupos), 'armados': {}}
+        self._continuar_carga()
+
+    @property
+    def cargando(self):
+        """True mientras haya una reconstrucción del modelo sin terminar."""
+        return self._carga is not None
+
+    def cancelar_carga(self):
+        """Descarta la reconstrucción en curso (la tabla queda como estaba)."""
+        if self._tarea_carga is not None:
+            self.tree.after_cancel(self._tarea_carga)
+            self._tarea_carga = None
+        self._carga = None
+
+    def _terminar_carga(self):
+        """Completa de una vez la reconstrucción pendiente, si la hay."""
+        if self._carga is None:
+            return
+        if self._tarea_carga is not None:
+            self.tree.after_cancel(self._tarea_carga)
+            self._tarea_carga = None
+        self._agrupar(None)
+        self._aplicar_carga()
+
+    @medido("tabla.tramo_carga")
+    def _continuar_carga(self):
+        self._tarea_carga = None
+        if self._agrupar(self.PRESUPUESTO_CARGA_MS / 1000):
+            self._aplicar_carga()
+        else:
+            # after(1) y no after_idle: entre tramos se atienden teclado y mouse
+            self._tarea_carga = self.tree.after(1, self._continuar_carga)
+
+    def _agrupar(self, presupuesto):
+        """
+        Lee grupos pendientes durante a lo sumo `presupuesto` segundos (sin límite
+        si es None). Devuelve True si ya no queda ninguno.
+        """
+        carga = self._carga
+        armados = carga['armados']
+        limite = None if presupuesto is None else time.perf_counter() + presupuesto
+        # Los grupos llegan en orden de fecha: el diccionario queda ordenado
+        for fecha, grupo in carga['grupos']:
+            if grupo:
+                armados[fecha] = grupo
+            if limite is not None and time.perf_counter() >= limite:
+                return False
+        return True
+
+    def _aplicar_carga(self):
+        self._grupos = self._carga['armados']
+        self._carga = None
+        self._fechas = list(self._grupos)
+        self._recalcular_inicios()
+        self._cache.clear()
+        self._etiquetas.clear()
+        self._renderizar()
+
+    @medido("tabla.insertar")
+    def insertar(self, producto):
+        """
+        Agrega un producto a su grupo de fecha, que se mantiene ordenado por ID
+        (normalmente al final). El separador se crea solo si la fecha es nueva;
+        solo se redibuja la vista si el cambio cae en ella.
+        """
+        self._terminar_carga()
+        if self._fila_de(producto) is not None:
+            # Una reconstrucción por tramos ya leyó el grupo con el producto
+            self._reemplazar(producto)
+            return
+        # Si se estaba viendo el final de la tabla, la vista sigue a las filas nuevas
+        al_final = self._desplazamiento + self._visibles >= self._total_filas
+        filas_antes = self._total_filas
+        g = bisect.bisect_left(self._fechas, producto.fecha)
+        grupo = self._grupos.get(producto.fecha)
+        if grupo is None:
+            grupo = self._grupos[producto.fecha] = []
+            inicio = self._inicios[g] if g < len(self._inicios) else self._total_filas
+            self._fechas.insert(g, producto.fecha)
+            self._inicios.insert(g, inicio)
+            self._mover_inicios(g + 1, 1)
+            primera_fila = inicio
+            grupo.append(producto)
+        elif grupo[-1].id < producto.id:
+            primera_fila = self._inicios[g] + len(grupo) + 1
+            grupo.append(producto)
+        else:
+            posicion = bisect.bisect_left(grupo, producto.id, key=_id_de)
+            primera_fila = self._inicios[g] + 1 + posicion
+            grupo.insert(posicion, producto)
+        self._mover_inicios(g + 1, 1)
+        if al_final and primera_fila >= filas_antes - 1:
+            self._desplazamiento += self._total_filas - filas_antes
+        self._refrescar_desde(primera_fila)
+
+    @medido("tabla.actualizar")
+    def actualizar(self, anterior, producto):
+        """Reemplaza la fila de un producto por su versión actualizada."""
+        self._terminar_carga()
+        if anterior.fecha != producto.fecha:
+            self.quitar(anterior)
+            self.insertar(producto)
+            return
+        self._reemplazar(producto)
+
+    def _reemplazar(self, producto):
+        """Pone el producto en lugar del que tiene su mismo ID (en su misma fecha) y redibuja su fila."""
+        grupo = self._grupos[producto.fecha]
+        posicion = self._posicion_en_grupo(grupo, producto)
+        self._cache.pop(grupo[posicion], None)
+        grupo[posicion] = producto
+        self._refrescar_fila(self._inicios[bisect.bisect_left(self._fechas, producto.fecha)] + 1 + posicion)
+
+    @medido("tabla.quitar")
+    def quitar(self, producto):
+        """Elimina la fila de un producto (y su separador si el grupo queda vacío)."""
+        self._terminar_carga()
+        fila = self._fila_de(producto)
+        if fila is None:
+            # Una reconstrucción por tramos leyó su grupo cuando ya no estaba
+            return
+        g = bisect.bisect_left(self._fechas, producto.fecha)
+        grupo = self._grupos[producto.fecha]
+        grupo.pop(fila - self._inicios[g] - 1)
+        self._etiquetas.pop(producto.id, None)
+        self._mover_inicios(g + 1, -1)
+        if not grupo:
+            del self._grupos[producto.fecha]
+            self._fechas.pop(g)
+            self._inicios.pop(g)
+            self._mover_inicios(g, -1)
+            fila -= 1
+        self._refrescar_desde(fila)
+
+    def resaltar(self, id_producto, etiqueta):
+        """Aplica una etiqueta de resaltado a la fila del producto con el ID dado."""
+        self._terminar_carga()
+        self._etiquetas[id_producto] = etiqueta
+        item = self._item_por_id.get(id_producto)
+        if item is not None:
+            self.tree.item(item, tags=(etiqueta,))
+
+    def limpiar_resaltado(self):
+        """Quita todos los resaltados."""
+        for id_producto in self._etiquetas:
+            item = self._item_por_id.get(id_producto)
+            if item is not None:
+                self.tree.item(item, tags=())
+        self._etiquetas.clear()
+
+    def ver(self, producto):
+        """Desplaza la vista para que la fila del producto quede visible."""
+        self._terminar_carga()
+        fila = self._fila_de(producto)
+        if fila is None:
+            return
+        if not self._desplazamiento <= fila < self._desplazamiento + self._visibles:
+            self._desplazamiento = fila - self._visibles // 2
+        self._renderizar()
+
+    def _recalcular_inicios(self):
+        self._inicios = []
+        fila = 0
+        for fecha in self._fechas:
+            self._inicios.append(fila)
+            fila += len(self._grupos[fecha]) + 1
+        self._total_filas = fila
+
+    def _mover_inicios(self, desde, delta):
+        """Corre las filas iniciales de los grupos a partir del índice dado."""
+        for g in range(desde, len(self._inicios)):
+            self._inicios[g] += delta
+        self._total_filas += delta
+
+    @staticmethod
+    def _posicion_en_grupo(grupo, producto):
+        """Posición del producto en su grupo (ordenado por ID), por búsqueda binaria."""
+        posicion = bisect.bisect_left(grupo, producto.id, key=_id_de)
+        if posicion == len(grupo) or grupo[posicion].id != producto.id:
+            raise ValueError("El producto no está en el historial")
+        return posicion
+
+    def _refrescar_desde(self, fila):
+        """
+        Tras insertar o quitar la fila indicada, las filas siguientes cambian de
+        posición. Si nada de eso es visible basta con actualizar la scrollbar;
+        si no, se redibuja la ventana visible.
+        """
+        if fila < self._desplazamiento + self._visibles:
+            self._renderizar()
+        else:
+            self._actualizar_scrollbar()
+
+    def _refrescar_fila(self, fila):
+        """Actualiza solo el item de la fila indicada si está en pantalla."""
+        k = fila - self._desplazamiento
+        if 0 <= k < len(self._items):
+            valores, etiquetas, id_producto = self._valores(fila)
+            self.tree.item(self._items[k], values=valores, tags=etiquetas)
+            self._item_por_id[id_producto] = self._items[k]
+
+    def _fila_de(self, producto):
+        """Índice de fila del producto en el modelo, o None si no está."""
+        g = bisect.bisect_left(self._fechas, producto.fecha)
+        if g == len(self._fechas) or self._fechas[g] != producto.fecha:
+            return None
+        try:
+            posicion = self._posicion_en_grupo(self._grupos[producto.fecha], producto)
+        except ValueError:
+            return None
+        return self._inicios[g] + 1 + posicion
+
+    def _valores(self, fila):
+        """Devuelve (valores, etiquetas, id del producto o None) de la fila indicada del modelo."""
+        g = bisect.bisect_right(self._inicios, fila) - 1
+        fecha = self._fechas[g]
+        desplazamiento = fila - self._inicios[g]
+        if desplazamiento == 0:
+            return ("",) * (len(self.columnas) - 1) + (fecha,), ('fecha_separador',), None
+        producto = self._grupos[fecha][desplazamiento - 1]
+        valores = self._cache.get(producto)
+        if valores is None:
+            valores = self._cache[producto] = self.formatear_fila(producto)
+            contar("tabla.filas_formateadas")
+        etiqueta = self._etiquetas.get(producto.id)
+        return valores, (etiqueta,) if etiqueta else (), producto.id
+
+    def _formatear_rango(self, inicio, fin):
+        """Formatea de una vez, con formatear_filas, las filas del rango que no están en la caché."""
+        if self.formatear_filas is None or inicio >= fin:
+            return
+        pendientes = []
+        g = bisect.bisect_right(self._inicios, inicio) - 1
+        while g < len(self._fechas) and self._inicios[g] < fin:
+            grupo = self._grupos[self._fechas[g]]
+            # La fila self._inicios[g] es el separador de la fecha
+            desde = max(0, inicio - self._inicios[g] - 1)
+            hasta = min(len(grupo), fin - self._inicios[g] - 1)
+            pendientes.extend(p for p in grupo[desde:hasta] if p not in self._cache)
+            g += 1
+        if pendientes:
+            for producto, valores in zip(pendientes, self.formatear_filas(pendientes)):
+                self._cache[producto] = valores
+            contar("tabla.filas_formateadas", len(pendientes))
+
+    @medido("tabla.renderizar")
+    def _renderizar(self):
+        maximo = max(0, self._total_filas - self._visibles)
+        self._desplazamiento = min(max(0, self._desplazamiento), maximo)
+        # Mantener acotada la caché de filas formateadas
+        if len(self._cache) > 4 * (self._visibles + 2 * self.buffer):
+            self._cache.clear()
+        cantidad = min(self._visibles, self._total_filas - self._desplazamiento)
+        self._formatear_rango(self._desplazamiento, self._desplazamiento + cantidad)
+        self._item_por_id = {}
+        for k in range(cantidad):
+            valores, etiquetas, id_producto = self._valores(self._desplazamiento + k)
+            if k < len(self._items):
+                self.tree.item(self._items[k], values=valores, tags=etiquetas)
+            else:
+                self._items.append(self.tree.insert("", tk.END, values=valores, tags=etiquetas))
+            if id_producto is not None:
+                self._item_por_id[id_producto] = self._items[k]
+        if len(self._items) > cantidad:
+            self.tree.delete(*self._items[cantidad:])
+            del self._items[cantidad:]
+        self._actualizar_scrollbar()
+        self._programar_precarga()
+
+    def _actualizar_scrollbar(self):
+        if self._total_filas > self._visibles:
+            self.scrollbar.set(
+                self._desplazamiento / self._total_filas,
+                (self._desplazamiento + self._visibles) / self._total_filas
+            )
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _programar_precarga(self):
+        """Formatea en segundo plano las filas del buffer alrededor de la vista."""
+        if self._precarga is not None:
+            self.tree.after_cancel(self._precarga)
+        self._precarga = self.tree.after_idle(self._precargar)
+
+    def _precargar(self):
+        self._precarga = None
+        inicio = max(0, self._desplazamiento - self.buffer)
+        fin = min(self._total_filas, self._desplazamiento + self._visibles + self.buffer)
+        self._formatear_rango(inicio, fin)
+        for fila in range(inicio, fin):
+            self._valores(fila)
+
+    def _mover(self, filas, mantener_foco=False):
+        if not mantener_foco:
+            self.tree.selection_set(())
+        self._desplazamiento += filas
+        self._renderizar()
+        return "break"
+
+    def _desplazar(self, accion, cantidad, unidad=None):
+        """Comando de la scrollbar: 'moveto' con una fracción o 'scroll' por unidades/páginas."""
+        if accion == "moveto":
+            self._desplazamiento = int(float(cantidad) * self._total_filas)
+            self.tree.selection_set(())
+            self._renderizar()
+        elif accion == "scroll":
+            paso = self._visibles if unidad == "pages" else 1
+            self._mover(int(cantidad) * paso)
+
+    def _rueda(self, event):
+        # Windows envía múltiplos de 120; macOS, valores pequeños
+        pasos = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self._mover(-3 * pasos)
+
+    def _tecla_arriba(self, event):
+        if self._items and self.tree.focus() == self._items[0] and self._desplazamiento > 0:
+            return self._mover(-1, mantener_foco=True)
+
+    def _tecla_abajo(self, event):
+        if self._items and self.tree.focus() == self._items[-1]:
+            return self._mover(1, mantener_foco=True)
+
+    def _al_redimensionar(self, event):
+        alto_fila = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        encabezado = alto_fila
+        if self._items:
+            caja = self.tree.bbox(self._items[0])
+            if caja:
+                encabezado, alto_fila = caja[1], caja[3]
+        visibles = max(1, (event.height - encabezado) // alto_fila)
+        if visibles != self._visibles:
+            self._visibles = visibles
+            self._renderizar()
@@ -1,12 +1,32 @@
 import tkinter as tk
 from tkinter import messagebox, simpledialog, ttk
 import datetime
-from utils.formatters import formatear_pesos, formatear_numero
+import threading
+from utils.formatters import formatear_pesos, formatear_numero, formatear_columna
+from utils.exportacion import exportar_productos, ExportacionCancelada
+from utils.importacion import convertir_numero
+from controllers.filtros import Filtro
 from utils.validators import ValidacionError
+from utils import instrumentacion
+from views.historial_virtual import HistorialVirtual
+from views.dialogos import GestorDialogos
 import tkinter.filedialog as filedialog
-import openpyxl
 
 class MainWindow:
+    # Espera tras la última tecla antes de buscar mientras se escribe
+    ESPERA_BUSQUEDA_MS = 150
+    # Máximo de resultados mostrados (y resaltados) en la ventana de búsqueda
+    LIMITE_RESULTADOS_BUSQUEDA = 50
+    # Cada cuánto se consultan los avisos del guardado en segundo plano
+    INTERVALO_AVISOS_MS = 250
+    # Cada cuánto se revisa si terminó la lectura del historial al arrancar
+    INTERVALO_CARGA_MS = 20
+    # Lotes con más cambios que esto redibujan la tabla completa
+    LIMITE_CAMBIOS_INCREMENTALES = 200
+    # Operaciones recientes listadas en la ventana de diagnóstico y su refresco
+    OPERACIONES_DIAGNOSTICO = 50
+    INTERVALO_DIAGNOSTICO_MS = 1000
+
     def __init__(self, root, controller):
         """
         Inicializa la ventana principal de la aplicación.
@@ -14,6 +34,10 @@ class MainWindow:
         """
         self.root = root
         self.controller = controller
+        # Filtro aplicado a la tabla de historial (None: se muestra todo)
+        self._filtro = None
+        # Ventanas emergentes que se crean una vez y se reutilizan
+        self._dialogos = GestorDialogos(root)
         self.root.title("PapeleriaApp")
         self.root.configure(bg="#f0f2f5")
         
@@ -25,7 +49,15 @@ class MainWindow:
         
         self._crear_widgets()
         self._configurar_layout()
-        self.mostrar_historial()
+        # La tabla se actualiza aplicando solo el cambio de cada alta, edición o baja
+        self.controller.suscribir(self._aplicar_cambio_historial)
+        if self.controller.cargado:
+            self.mostrar_historial()
+        else:
+            # Arranque rápido: la ventana se muestra con la tabla vacía y el
+            # historial se lee en otro hilo mientras se dibuja el primer cuadro
+            self._cargar_historial_en_segundo_plano()
+        self.root.after(self.INTERVALO_AVISOS_MS, self._revisar_avisos_guardado)
 
     def _formatear_entrada_precio(self, event, entry):
         """
@@ -146,7 +178,7 @@ class MainWindow:
         self.boton_agregar = tk.Button(
             frame_campos,
             text="Agregar Producto",
-            command=self.agregar_producto,
+            command=self._cuando_cargado(self.agregar_producto),
             bg="#4CAF50",
             fg="white",
             font=("Arial", 10),
@@ -164,7 +196,7 @@ class MainWindow:
         self.nombre_entry.bind('<Return>', lambda e: self.precio_entry.focus_set())
         self.precio_entry.bind('<Return>', lambda e: self.cantidad_entry.focus_set())
         self.cantidad_entry.bind('<Return>', calcular_precio_unitario_y_saltar)
-        self.precio_venta_entry.bind('<Return>', lambda e: self.agregar_producto())
+        self.precio_venta_entry.bind('<Return>', lambda e: self._cuando_cargado(self.agregar_producto)())
 
     def _crear_botones(self):
         """
@@ -179,6 +211,7 @@ class MainWindow:
             'Resumen del día': 'Ctrl+R',
             'Agregar Producto': 'Ctrl+N',
             'Exportar a Excel': 'Ctrl+X',
+            'Importar compras': 'Ctrl+I',
             'Filtrar productos': 'Ctrl+F',
         }
         self.atajos_funciones = {
@@ -188,7 +221,10 @@ class MainWindow:
             '<Control-r>': self.mostrar_resumen_dia,  # Nueva función a implementar
             '<Control-n>': lambda: self.nombre_entry.focus_set(),
             '<Control-x>': self.exportar_excel,
+            '<Control-i>': self.importar_compras,
             '<Control-f>': self.filtrar_productos,  # Nueva función placeholder
+            # Oculto (sin botón): ventana de diagnóstico de rendimiento
+            '<Control-Shift-D>': self.mostrar_diagnostico,
         }
         # Frame para botones de la derecha
         self.frame_botones_derecha = tk.Frame(self.frame_principal, bg="#f0f2f5", padx=10)
@@ -209,11 +245,12 @@ class MainWindow:
             ("🔎 Filtrar productos", self.filtrar_productos, "#607d8b"),
             ("➕ Agregar Producto", self.agregar_producto, "#4CAF50"),
             ("📤 Exportar a Excel", self.exportar_excel, "#607d8b"),
+            ("📥 Importar compras", self.importar_compras, "#607d8b"),
         ]
         frame_grid = tk.Frame(self.frame_botones_derecha, bg="#f0f2f5")
         frame_grid.pack(fill=tk.Y, expand=False)
         for i, (texto, comando, color) in enumerate(botones_derecha):
-            atajo = self.atajos.get(texto.replace('🔍 ','').replace('✏️ ','').replace('🗑️ ','').replace('📊 ','').replace('🔎 ','').replace('➕ ','').replace('📤 ',''), "")
+            atajo = self.atajos.get(texto.replace('🔍 ','').replace('✏️ ','').replace('🗑️ ','').replace('📊 ','').replace('🔎 ','').replace('➕ ','').replace('📤 ','').replace('📥 ',''), "")
             label_atajo = tk.Label(
                 frame_grid,
                 text=atajo,
@@ -227,7 +264,7 @@ class MainWindow:
             boton = tk.Button(
                 frame_grid,
                 text=texto,
-                command=comando,
+                command=self._cuando_cargado(comando, consulta=comando == self.mostrar_resumen_dia),
                 bg=color,
                 fg="white",
                 font=("Arial", 10),
@@ -240,6 +277,8 @@ class MainWindow:
             boton.grid(row=i, column=1, sticky="w", padx=(0, 0), pady=3)
         frame_grid.grid_columnconfigure(1, weight=0)
         for atajo, funcion in self.atajos_funciones.items():
+            if funcion != self.mostrar_diagnostico:
+                funcion = self._cuando_cargado(funcion, consulta=funcion == self.mostrar_resumen_dia)
             self.root.bind(atajo, lambda e, f=funcion: f())
 
     def _crear_tabla_historial(self):
@@ -266,25 +305,56 @@ class MainWindow:
             "Precio Venta", "Ganancia U.", "Ganancia Total", "Fecha"
         )
         
-        self.historial = ttk.Treeview(frame_tabla_scroll, columns=columnas, show="headings", height=15)
+        # Tabla virtualizada: solo se crean los items visibles
+        self.historial = HistorialVirtual(
+            frame_tabla_scroll, columnas, self._valores_fila_historial,
+            formatear_filas=self._valores_filas_historial
+        )
+        tabla = self.historial.tree
         
         # Configurar columnas
         for col in columnas:
-            self.historial.heading(col, text=col)
-            self.historial.column(col, anchor=tk.CENTER, width=110)
+            tabla.heading(col, text=col)
+            tabla.column(col, anchor=tk.CENTER, width=110)
         
-        # Configurar el estilo para el resaltado
-        self.historial.tag_configure('resaltado', background='#FFEB3B')
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(frame_tabla_scroll, orient=tk.VERTICAL, command=self.historial.yview)
-        self.historial.configure(yscrollcommand=scrollbar.set)
+        # Configurar el estilo para el resaltado y para la fila de fecha
+        tabla.tag_configure('resaltado', background='#FFEB3B')
+        tabla.tag_configure('editar_resaltado', background='#bbdefb')  # azul claro
+        tabla.tag_configure('eliminar_resaltado', background='#ffcdd2')  # rojo claro
+        tabla.tag_configure(
+            'fecha_separador',
+            background='#e0e0e0',
+            foreground='#2196F3',
+            font=("Arial", 11, "bold")
+        )
         
         # Empaquetar tabla y scrollbar
-        self.historial.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        tabla.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.historial.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
         frame_tabla_scroll.pack(fill=tk.BOTH, expand=True)
+        
+        frame_estado = tk.Frame(frame_tabla, bg="#f0f2f5")
+        # Filtro activo (a la izquierda) y estado del guardado en segundo plano (a la derecha)
+        self.label_filtro = tk.Label(
+            frame_estado,
+            text="",
+            font=("Arial", 9),
+            fg="#607d8b",
+            bg="#f0f2f5",
+            anchor="w"
+        )
+        self.label_filtro.pack(side=tk.LEFT)
+        self.label_estado_guardado = tk.Label(
+            frame_estado,
+            text="",
+            font=("Arial", 9),
+            fg="#757575",
+            bg="#f0f2f5",
+            anchor="e"
+        )
+        self.label_estado_guardado.pack(side=tk.RIGHT, fill=tk.X, expand=True)
+        frame_estado.pack(fill=tk.X)
         frame_tabla.pack(fill=tk.BOTH, expand=True)
 
     def _configurar_layout(self):
@@ -384,7 +454,6 @@ class MainWindow:
                 float(precio_venta)
             )
             self.limpiar_entradas()
-            self.mostrar_historial()
         except ValidacionError as e:
             self.mostrar_errores_registro({"nombre": str(e)})
         except Exception as e:
@@ -403,56 +472,158 @@ class MainWindow:
     def mostrar_historial(self):
         """
         Muestra el historial de productos en la tabla principal, dividiendo visualmente por fechas de registro.
+        La tabla es virtual: solo se dibujan y formatean las filas visibles. El orden
+        lo da el controlador (por fecha y luego por ID), así que no se ordena aquí.
+        Si hay un filtro activo solo se muestran los productos que lo cumplen.
         """
-        # Limpiar tabla
-        for item in self.historial.get_children():
-            self.historial.delete(item)
-        
-        # Obtener productos y ordenarlos por fecha (de más reciente a más antiguo)
-        productos = self.controller.obtener_productos()
-        productos_ordenados = sorted(productos, key=lambda p: p.fecha, reverse=False)
-        
-        fecha_actual = None
-        for idx, producto in enumerate(productos_ordenados):
-            # Si la fecha cambia, insertar una fila separadora
-            if producto.fecha != fecha_actual:
-                fecha_actual = producto.fecha
-                # Insertar fila especial para la fecha
-                self.historial.insert(
-                    "", tk.END,
-                    values=("", "", "", "", "", "", "", "", fecha_actual),
-                    tags=("fecha_separador",)
-                )
-            # Insertar producto normalmente
-            self.historial.insert("", tk.END, values=(
-                idx + 1,  # ID comienza en 1
-                producto.nombre,
-                formatear_pesos(producto.precio_total),
-                producto.cantidad,
-                formatear_pesos(producto.precio_unitario),
-                formatear_pesos(producto.precio_venta_usuario),
-                formatear_pesos(producto.ganancia_unitaria),
-                formatear_pesos(producto.ganancia_total),
-                producto.fecha
-            ))
-        # Configurar el estilo para la fila de fecha
-        self.historial.tag_configure(
-            'fecha_separador',
-            background='#e0e0e0',
-            foreground='#2196F3',
-            font=("Arial", 11, "bold")
+        if self._filtro is not None:
+            resultados = self.controller.filtrar_productos(self._filtro)
+            self.historial.cargar(resultados)
+            self.label_filtro.config(
+                text=f"Filtro activo: {len(resultados)} de {len(self.controller.obtener_productos())} "
+                     f"productos (Ctrl+F para cambiarlo)"
+            )
+        else:
+            self.historial.cargar_grupos(self.controller.grupos_por_fecha())
+            self.label_filtro.config(text="")
+
+    def _cargar_historial_en_segundo_plano(self):
+        """
+        Lee el historial del controlador en otro hilo y lo aplica (en el hilo de la
+        interfaz) cuando termina; el aviso "recargado" del controlador llena la tabla.
+        """
+        self.historial.cargar([])
+        self.label_estado_guardado.config(text="Cargando historial...", fg="#757575")
+        estado = {}
+
+        def trabajar():
+            estado['historial'] = self.controller.leer_historial()
+
+        def revisar():
+            if 'historial' not in estado:
+                self.root.after(self.INTERVALO_CARGA_MS, revisar)
+                return
+            self.controller.aplicar_historial(estado['historial'])
+            self.label_estado_guardado.config(text="")
+
+        threading.Thread(target=trabajar, name="carga", daemon=True).start()
+        self.root.after(self.INTERVALO_CARGA_MS, revisar)
+
+    def _cuando_cargado(self, funcion, consulta=False):
+        """
+        Envuelve una acción para que no corra mientras el historial se está
+        cargando (se registraría sobre un historial todavía vacío). Las consultas
+        (consulta=True) corren antes si el almacenamiento puede responderlas.
+        """
+        def accion(*args):
+            disponible = self.controller.consultas_disponibles if consulta else self.controller.cargado
+            if not disponible:
+                self.label_estado_guardado.config(
+                    text="Cargando historial, espere un momento...", fg="#FF9800")
+                return
+            return funcion(*args)
+        return accion
+
+    def _aplicar_cambio_historial(self, cambio):
+        """
+        Aplica a la tabla de historial un cambio notificado por el controlador,
+        sin reconstruirla.
+        """
+        if self._filtro is not None:
+            # El cambio puede hacer entrar o salir productos del filtro
+            self.mostrar_historial()
+            return
+        if cambio.tipo == "insertado":
+            self.historial.insertar(cambio.producto)
+        elif cambio.tipo == "actualizado":
+            self.historial.actualizar(cambio.anterior, cambio.producto)
+        elif cambio.tipo == "eliminado":
+            self.historial.quitar(cambio.producto)
+        elif cambio.tipo == "recargado":
+            self.mostrar_historial()
+        elif cambio.tipo == "lote":
+            if len(cambio.cambios) > self.LIMITE_CAMBIOS_INCREMENTALES:
+                self.mostrar_historial()
+            else:
+                for c in cambio.cambios:
+                    self._aplicar_cambio_historial(c)
+
+    def _revisar_avisos_guardado(self):
+        """
+        Muestra los avisos del hilo de persistencia (guardados y errores) y se
+        vuelve a programar con root.after.
+        """
+        error = None
+        duracion = None
+        for tipo, detalle in self.controller.obtener_avisos():
+            if tipo == "error":
+                error = detalle
+            elif tipo == "recuperado":
+                messagebox.showwarning("Historial recuperado", detalle)
+            else:
+                duracion = detalle
+        if error:
+            self.label_estado_guardado.config(text=error, fg="#f44336")
+            messagebox.showerror("Error al guardar", error)
+        elif duracion is not None:
+            hora = datetime.datetime.now().strftime("%H:%M:%S")
+            self.label_estado_guardado.config(
+                text=f"Cambios guardados ({hora}, {duracion * 1000:.0f} ms)",
+                fg="#757575"
+            )
+        self.root.after(self.INTERVALO_AVISOS_MS, self._revisar_avisos_guardado)
+
+    def _valores_fila_historial(self, producto):
+        """
+        Devuelve los valores formateados de la fila de un producto en el historial.
+        Se llama solo cuando la fila entra en la vista.
+        """
+        return (
+            producto.id,
+            producto.nombre,
+            formatear_pesos(producto.precio_total),
+            producto.cantidad,
+            formatear_pesos(producto.precio_unitario),
+            formatear_pesos(producto.precio_venta_usuario),
+            formatear_pesos(producto.ganancia_unitaria),
+            formatear_pesos(producto.ganancia_total),
+            producto.fecha
+        )
+
+    def _valores_filas_historial(self, productos):
+        """
+        Versión por lotes de _valores_fila_historial: formatea columna por columna
+        las filas que entran juntas en la vista.
+        """
+        precios_total, precios_unitarios, precios_venta, ganancias_u, ganancias_total = (
+            formatear_columna([getattr(p, campo) for p in productos])
+            for campo in ('precio_total', 'precio_unitario', 'precio_venta_usuario',
+                          'ganancia_unitaria', 'ganancia_total')
         )
+        return [
+            (p.id, p.nombre, precio_total, p.cantidad, precio_unitario, precio_venta,
+             ganancia_u, ganancia_total, p.fecha)
+            for p, precio_total, precio_unitario, precio_venta, ganancia_u, ganancia_total
+            in zip(productos, precios_total, precios_unitarios, precios_venta, ganancias_u, ganancias_total)
+        ]
 
     def buscar_producto(self):
         """
         Abre una ventana para buscar productos por ID o nombre.
         Permite buscar y resaltar productos en el historial.
         """
-        ventana = self._crear_ventana_emergente("Buscar Producto", "500x350")
+        self._dialogos.mostrar("buscar", "Buscar Producto", "820x440", self._construir_buscar_producto)
+
+    def _construir_buscar_producto(self, dialogo):
+        """Crea la ventana de búsqueda y devuelve la función que la prepara en cada apertura."""
+        ventana = dialogo.ventana
         def on_closing():
-            for item in self.historial.get_children():
-                self.historial.item(item, tags=())
-            ventana.destroy()
+            nonlocal busqueda_pendiente
+            if busqueda_pendiente is not None:
+                ventana.after_cancel(busqueda_pendiente)
+                busqueda_pendiente = None
+            self.historial.limpiar_resaltado()
+            dialogo.ocultar()
         ventana.protocol("WM_DELETE_WINDOW", on_closing)
         frame_principal = tk.Frame(ventana, bg="#ffffff", padx=20, pady=20)
         frame_principal.pack(fill=tk.BOTH, expand=True)
@@ -514,6 +685,14 @@ class MainWindow:
             value="nombre",
             bg="#ffffff"
         ).pack(side=tk.LEFT, padx=10)
+        # En modo nombre, busca mientras se escribe (con una pequeña espera entre teclas)
+        busqueda_en_vivo = tk.BooleanVar(value=True)
+        tk.Checkbutton(
+            frame_opciones,
+            text="Mientras escribe",
+            variable=busqueda_en_vivo,
+            bg="#ffffff"
+        ).pack(side=tk.LEFT, padx=10)
         tk.Label(
             frame_busqueda,
             text="Ingrese el término de búsqueda:",
@@ -524,125 +703,203 @@ class MainWindow:
         entry_busqueda.pack(pady=(0, 20))
         frame_resultados = tk.Frame(frame_principal, bg="#ffffff")
         frame_resultados.pack(fill=tk.BOTH, expand=True)
+        # Resultados en una tabla cuyas filas se reutilizan de una búsqueda a otra;
+        # se muestran de a LIMITE_RESULTADOS_BUSQUEDA con el botón "Mostrar más"
+        columnas = self.historial.columnas
+        frame_tabla_resultados = tk.Frame(frame_resultados, bg="#ffffff")
+        frame_tabla_resultados.pack(fill=tk.BOTH, expand=True)
+        tabla_resultados = ttk.Treeview(frame_tabla_resultados, columns=columnas, show="headings", height=7)
+        for col in columnas:
+            tabla_resultados.heading(col, text=col)
+            tabla_resultados.column(col, anchor=tk.CENTER, width=150 if col == "Nombre" else 75)
+        scroll_resultados = ttk.Scrollbar(frame_tabla_resultados, orient=tk.VERTICAL,
+                                          command=tabla_resultados.yview)
+        tabla_resultados.configure(yscrollcommand=scroll_resultados.set)
+        tabla_resultados.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scroll_resultados.pack(side=tk.RIGHT, fill=tk.Y)
+        frame_pie = tk.Frame(frame_resultados, bg="#ffffff")
+        frame_pie.pack(fill=tk.X, pady=(4, 0))
+        label_resultados = tk.Label(frame_pie, text="", font=("Arial", 9), bg="#ffffff", fg="#666666")
+        label_resultados.pack(side=tk.LEFT)
+        boton_mas = tk.Button(
+            frame_pie,
+            text="Mostrar más",
+            command=lambda: mostrar_mas(),
+            bg="#607d8b",
+            fg="white",
+            font=("Arial", 9),
+            padx=8,
+            bd=0,
+            cursor="hand2"
+        )
+        # Búsqueda mostrada: término, productos en la tabla (en orden) y total de coincidencias
+        resultados = {'termino': "", 'productos': [], 'total': 0}
+        busqueda_pendiente = None
+
+        def mostrar_filas(desde):
+            """Escribe en la tabla las filas desde la posición dada, reutilizando items."""
+            productos = resultados['productos']
+            items = tabla_resultados.get_children()
+            for k, valores in enumerate(self._valores_filas_historial(productos[desde:]), start=desde):
+                if k < len(items):
+                    tabla_resultados.item(items[k], values=valores)
+                else:
+                    tabla_resultados.insert("", tk.END, values=valores)
+            if len(items) > len(productos):
+                tabla_resultados.delete(*items[len(productos):])
+            mostrados = len(productos)
+            if not mostrados:
+                label_resultados.config(text="No se encontraron productos")
+            elif resultados['total'] > mostrados:
+                label_resultados.config(text=f"Mostrando {mostrados} de {resultados['total']} resultados")
+            else:
+                label_resultados.config(text=f"{mostrados} resultado(s)")
+            if resultados['total'] > mostrados:
+                boton_mas.pack(side=tk.RIGHT)
+            else:
+                boton_mas.pack_forget()
+
+        def mostrar_mas():
+            productos = resultados['productos']
+            nuevos = list(self.controller.consultar_productos(
+                nombre=resultados['termino'], orden="relevancia",
+                desplazamiento=len(productos), limite=self.LIMITE_RESULTADOS_BUSQUEDA
+            ))
+            productos.extend(nuevos)
+            mostrar_filas(len(productos) - len(nuevos))
+            self.resaltar_productos_en_historial([p.id for p in productos])
+
+        def ver_seleccionado(event=None):
+            seleccion = tabla_resultados.selection()
+            if seleccion:
+                producto = resultados['productos'][tabla_resultados.index(seleccion[0])]
+                self.historial.ver(producto)
+
+        tabla_resultados.bind('<<TreeviewSelect>>', ver_seleccionado)
+
+        def programar_busqueda(event=None):
+            nonlocal busqueda_pendiente
+            if tipo_busqueda.get() != "nombre" or not busqueda_en_vivo.get():
+                return
+            if busqueda_pendiente is not None:
+                ventana.after_cancel(busqueda_pendiente)
+            busqueda_pendiente = ventana.after(self.ESPERA_BUSQUEDA_MS, realizar_busqueda)
         def realizar_busqueda(event=None):
-            for widget in frame_resultados.winfo_children():
-                widget.destroy()
+            nonlocal busqueda_pendiente
+            if busqueda_pendiente is not None:
+                ventana.after_cancel(busqueda_pendiente)
+                busqueda_pendiente = None
             termino = entry_busqueda.get().strip()
             tipo = tipo_busqueda.get()
             productos = []
+            total = 0
             if tipo == "id":
                 try:
-                    id_busqueda = int(termino) - 1
+                    id_busqueda = int(termino)
                     prod = self.controller.obtener_producto(id_busqueda)
                     if prod:
                         productos = [prod]
+                        total = 1
                     self.resaltar_producto_en_historial(id_busqueda)
                 except ValueError:
                     productos = []
             else:
-                # Búsqueda flexible por nombre (parcial, insensible a mayúsculas)
-                productos = [p for p in self.controller.obtener_productos() if termino.lower() in p.nombre.lower()]
-                for idx, p in enumerate(self.controller.obtener_productos()):
-                    if termino.lower() in p.nombre.lower():
-                        self.resaltar_producto_en_historial(idx)
-            if not productos:
-                tk.Label(
-                    frame_resultados,
-                    text="No se encontraron productos",
-                    font=("Arial", 10),
-                    bg="#ffffff",
-                    fg="#666666"
-                ).pack()
-                return
-            for idx, producto in enumerate(productos):
-                frame_producto = tk.Frame(frame_resultados, bg="#ffffff", pady=5)
-                frame_producto.pack(fill=tk.X)
-                tk.Label(
-                    frame_producto,
-                    text=f"ID: {producto.id if hasattr(producto, 'id') else ''}",
-                    font=("Arial", 10, "bold"),
-                    bg="#ffffff"
-                ).pack(anchor="w")
-                tk.Label(
-                    frame_producto,
-                    text=f"Nombre: {producto.nombre}",
-                    font=("Arial", 10, "bold"),
-                    bg="#ffffff"
-                ).pack(anchor="w")
-                tk.Label(
-                    frame_producto,
-                    text=f"Precio total: {formatear_pesos(producto.precio_total)}",
-                    font=("Arial", 10),
-                    bg="#ffffff"
-                ).pack(anchor="w")
-                tk.Label(
-                    frame_producto,
-                    text=f"Cantidad: {producto.cantidad}",
-                    font=("Arial", 10),
-                    bg="#ffffff"
-                ).pack(anchor="w")
-                tk.Label(
-                    frame_producto,
-                    text=f"Precio unitario: {formatear_pesos(producto.precio_unitario)}",
-                    font=("Arial", 10),
-                    bg="#ffffff"
-                ).pack(anchor="w")
-                tk.Label(
-                    frame_producto,
-                    text=f"Precio venta: {formatear_pesos(producto.precio_venta_usuario)}",
-                    font=("Arial", 10),
-                    bg="#ffffff"
-                ).pack(anchor="w")
-                tk.Label(
-                    frame_producto,
-                    text=f"Ganancia unitaria: {formatear_pesos(producto.ganancia_unitaria)}",
-                    font=("Arial", 10),
-                    bg="#ffffff"
-                ).pack(anchor="w")
-                tk.Label(
-                    frame_producto,
-                    text=f"Ganancia total: {formatear_pesos(producto.ganancia_total)}",
-                    font=("Arial", 10),
-                    bg="#ffffff"
-                ).pack(anchor="w")
+                # Búsqueda flexible por nombre (parcial, insensible a mayúsculas, por relevancia)
+                if termino:
+                    productos = self.controller.buscar_por_nombre(termino, self.LIMITE_RESULTADOS_BUSQUEDA)
+                    total = self.controller.contar_por_nombre(termino)
+                self.resaltar_productos_en_historial([p.id for p in productos])
+            resultados.update(termino=termino, productos=productos, total=total)
+            mostrar_filas(0)
+            if productos:
+                tabla_resultados.yview_moveto(0)
         entry_busqueda.bind('<Return>', realizar_busqueda)
+        entry_busqueda.bind('<KeyRelease>', programar_busqueda)
         ventana.bind('<Return>', realizar_busqueda)
-        entry_busqueda.focus_set()
+
+        def actualizar():
+            # Cada apertura empieza sin término ni resultados (el historial pudo cambiar);
+            # el tipo de búsqueda y "Mientras escribe" quedan como los dejó el usuario
+            entry_busqueda.delete(0, tk.END)
+            resultados.update(termino="", productos=[], total=0)
+            tabla_resultados.delete(*tabla_resultados.get_children())
+            label_resultados.config(text="")
+            boton_mas.pack_forget()
+            entry_busqueda.focus_set()
+        return actualizar
 
     def resaltar_producto_en_historial(self, id_producto):
         """
         Resalta un producto en la tabla de historial según su ID.
         """
-        # Primero, quitar el resaltado de todos los items
-        for item in self.historial.get_children():
-            self.historial.item(item, tags=())
-        # Luego, resaltar el producto encontrado solo si está en rango
-        items = self.historial.get_children()
-        if id_producto is not None and 0 <= id_producto < len(items):
-            item = items[id_producto]
-            self.historial.item(item, tags=('resaltado',))
-            self.historial.see(item)  # Hacer scroll hasta el item resaltado
+        self._resaltar_en_historial(id_producto, 'resaltado')
+
+    def resaltar_productos_en_historial(self, ids_productos):
+        """
+        Resalta varios productos en la tabla de historial y desplaza la tabla hasta el primero.
+        """
+        self.historial.limpiar_resaltado()
+        if not ids_productos:
+            return
+        primero = self.controller.obtener_producto(ids_productos[0])
+        if primero is not None:
+            self.historial.ver(primero)
+        for id_producto in ids_productos:
+            self.historial.resaltar(id_producto, 'resaltado')
+
+    def _resaltar_en_historial(self, id_producto, etiqueta):
+        """
+        Quita los resaltados previos y resalta con la etiqueta dada el producto indicado,
+        desplazando la tabla hasta él.
+        """
+        self.historial.limpiar_resaltado()
+        producto = self.controller.obtener_producto(id_producto)
+        if producto is not None:
+            self.historial.ver(producto)  # Hacer scroll hasta el item resaltado
+            self.historial.resaltar(id_producto, etiqueta)
 
     def editar_producto(self):
         """
         Abre una ventana para ingresar el ID del producto a editar.
         Navegación y confirmación con Enter.
         """
-        ventana_id = self._crear_ventana_emergente("Editar Producto", "400x200")
-        frame_id = tk.Frame(ventana_id, bg="#ffffff", padx=20, pady=20)
+        self._dialogos.mostrar(
+            "editar_id", "Editar Producto", "400x200",
+            lambda dialogo: self._construir_pedir_id(
+                dialogo, "Ingrese el ID del producto a editar:", "#FF9800",
+                self._ventana_editar_producto)
+        )
+
+    def eliminar_producto(self):
+        """
+        Abre una ventana para ingresar el ID del producto a eliminar.
+        Navegación y confirmación con Enter.
+        """
+        self._dialogos.mostrar(
+            "eliminar_id", "Eliminar Producto", "400x200",
+            lambda dialogo: self._construir_pedir_id(
+                dialogo, "Ingrese el ID del producto a eliminar:", "#F44336",
+                self._confirmar_eliminacion)
+        )
+
+    def _construir_pedir_id(self, dialogo, texto, color, al_continuar):
+        """
+        Crea los widgets de la ventana que pide el ID de un producto. Con un ID
+        existente se oculta y llama a al_continuar(id_producto, producto).
+        """
+        frame_id = tk.Frame(dialogo.ventana, bg="#ffffff", padx=20, pady=20)
         frame_id.pack(fill=tk.BOTH, expand=True)
 
         tk.Label(
             frame_id,
-            text="Ingrese el ID del producto a editar:",
+            text=texto,
             font=("Arial", 12, "bold"),
             bg="#ffffff",
-            fg="#FF9800"
+            fg=color
         ).pack(pady=(0, 10))
 
         entry_id = tk.Entry(frame_id, font=("Arial", 12), width=10, justify="center")
         entry_id.pack(pady=(0, 20))
-        entry_id.focus_set()
 
         label_error = tk.Label(frame_id, text="", font=("Arial", 10), fg="#F44336", bg="#ffffff")
         label_error.pack()
@@ -653,21 +910,21 @@ class MainWindow:
                 label_error.config(text="Ingrese un ID válido (número mayor a 0)")
                 entry_id.focus()
                 return
-            id_producto = int(valor) - 1
+            id_producto = int(valor)
             producto = self.controller.obtener_producto(id_producto)
             if not producto:
                 label_error.config(text="Producto no encontrado")
                 entry_id.focus()
                 return
-            ventana_id.destroy()
-            self._ventana_editar_producto(id_producto, producto)
+            dialogo.ocultar()
+            al_continuar(id_producto, producto)
 
         frame_botones = tk.Frame(frame_id, bg="#ffffff")
         frame_botones.pack(pady=10)
         tk.Button(
             frame_botones,
             text="Cancelar",
-            command=ventana_id.destroy,
+            command=dialogo.ocultar,
             bg="#9E9E9E",
             fg="white",
             font=("Arial", 10),
@@ -680,7 +937,7 @@ class MainWindow:
             frame_botones,
             text="Continuar",
             command=continuar,
-            bg="#FF9800",
+            bg=color,
             fg="white",
             font=("Arial", 10),
             width=15,
@@ -688,8 +945,14 @@ class MainWindow:
             bd=0,
             cursor="hand2"
         ).pack(side=tk.RIGHT, padx=5)
-        ventana_id.bind('<Return>', continuar)
-        entry_id.focus_set()
+        dialogo.ventana.bind('<Return>', continuar)
+
+        def actualizar():
+            # Cada apertura empieza con el campo vacío y sin errores
+            entry_id.delete(0, tk.END)
+            label_error.config(text="")
+            entry_id.focus_set()
+        return actualizar
 
     def _ventana_editar_producto(self, id_producto, producto):
         """
@@ -697,34 +960,28 @@ class MainWindow:
         Resalta el producto en el historial mientras se edita.
         """
         # Resaltar el producto en el historial con color azul claro
-        for item in self.historial.get_children():
-            self.historial.item(item, tags=())
-        items = self.historial.get_children()
-        if id_producto is not None and 0 <= id_producto < len(items):
-            item = items[id_producto]
-            self.historial.item(item, tags=('editar_resaltado',))
-            self.historial.see(item)
-        self.historial.tag_configure('editar_resaltado', background='#bbdefb')  # azul claro
-
-        ventana = self._crear_ventana_emergente("Editar Producto", "400x350")
+        self._resaltar_en_historial(id_producto, 'editar_resaltado')
+        self._dialogos.mostrar("editar", "Editar Producto", "400x350", self._construir_editar_producto, id_producto, producto)
+
+    def _construir_editar_producto(self, dialogo):
+        """Crea el formulario de edición y devuelve la función que carga cada producto."""
+        ventana = dialogo.ventana
+        # ID del producto que se está editando en esta apertura
+        editando = {'id': None}
         frame_formulario = tk.Frame(ventana, bg="#ffffff", padx=20, pady=20)
         frame_formulario.pack(fill=tk.BOTH, expand=True)
         tk.Label(frame_formulario, text="Nombre:", bg="#ffffff").pack(anchor="w")
         entry_nombre = tk.Entry(frame_formulario, width=30)
-        entry_nombre.insert(0, producto.nombre)
         entry_nombre.pack(pady=(0, 10))
         tk.Label(frame_formulario, text="Precio total:", bg="#ffffff").pack(anchor="w")
         entry_precio = tk.Entry(frame_formulario, width=30)
-        entry_precio.insert(0, formatear_numero(str(int(producto.precio_total))))
         entry_precio.pack(pady=(0, 10))
         entry_precio.bind('<KeyRelease>', lambda e: self._formatear_entrada_precio(e, entry_precio))
         tk.Label(frame_formulario, text="Cantidad:", bg="#ffffff").pack(anchor="w")
         entry_cantidad = tk.Entry(frame_formulario, width=30)
-        entry_cantidad.insert(0, str(producto.cantidad))
         entry_cantidad.pack(pady=(0, 10))
         tk.Label(frame_formulario, text="Precio de venta:", bg="#ffffff").pack(anchor="w")
         entry_precio_venta = tk.Entry(frame_formulario, width=30)
-        entry_precio_venta.insert(0, formatear_numero(str(int(producto.precio_venta_usuario))))
         entry_precio_venta.pack(pady=(0, 10))
         entry_precio_venta.bind('<KeyRelease>', lambda e: self._formatear_entrada_precio(e, entry_precio_venta))
         def guardar(event=None):
@@ -733,9 +990,9 @@ class MainWindow:
                 precio_total = float(entry_precio.get().replace(".", ""))
                 cantidad = int(entry_cantidad.get())
                 precio_venta = float(entry_precio_venta.get().replace(".", ""))
-                self.controller.actualizar_producto(id_producto, nombre, precio_total, cantidad, precio_venta)
-                ventana.destroy()
-                self.mostrar_historial()
+                self.controller.actualizar_producto(editando['id'], nombre, precio_total, cantidad, precio_venta)
+                dialogo.ocultar()
+                self.historial.limpiar_resaltado()
             except ValidacionError as e:
                 messagebox.showerror("Error de validación", str(e))
             except ValueError:
@@ -743,11 +1000,9 @@ class MainWindow:
             except Exception as e:
                 messagebox.showerror("Error", f"Error al actualizar el producto: {str(e)}")
         def cerrar_y_limpiar():
-            ventana.destroy()
-            # Limpiar resaltado y actualizar historial
-            for item in self.historial.get_children():
-                self.historial.item(item, tags=())
-            self.mostrar_historial()
+            dialogo.ocultar()
+            # Limpiar resaltado
+            self.historial.limpiar_resaltado()
         boton_guardar = tk.Button(
             frame_formulario,
             text="Guardar",
@@ -767,76 +1022,21 @@ class MainWindow:
         entry_cantidad.bind('<Return>', lambda e: entry_precio_venta.focus_set())
         entry_precio_venta.bind('<Return>', lambda e: boton_guardar.focus_set())
         boton_guardar.bind('<Return>', guardar)
-        entry_nombre.focus_set()
         ventana.protocol("WM_DELETE_WINDOW", cerrar_y_limpiar)
 
-    def eliminar_producto(self):
-        """
-        Abre una ventana para ingresar el ID del producto a eliminar.
-        Navegación y confirmación con Enter.
-        """
-        ventana_id = self._crear_ventana_emergente("Eliminar Producto", "400x200")
-        frame_id = tk.Frame(ventana_id, bg="#ffffff", padx=20, pady=20)
-        frame_id.pack(fill=tk.BOTH, expand=True)
-
-        tk.Label(
-            frame_id,
-            text="Ingrese el ID del producto a eliminar:",
-            font=("Arial", 12, "bold"),
-            bg="#ffffff",
-            fg="#F44336"
-        ).pack(pady=(0, 10))
-
-        entry_id = tk.Entry(frame_id, font=("Arial", 12), width=10, justify="center")
-        entry_id.pack(pady=(0, 20))
-        entry_id.focus_set()
-
-        label_error = tk.Label(frame_id, text="", font=("Arial", 10), fg="#F44336", bg="#ffffff")
-        label_error.pack()
-
-        def continuar(event=None):
-            valor = entry_id.get()
-            if not valor.isdigit() or int(valor) <= 0:
-                label_error.config(text="Ingrese un ID válido (número mayor a 0)")
-                entry_id.focus()
-                return
-            id_producto = int(valor) - 1
-            producto = self.controller.obtener_producto(id_producto)
-            if not producto:
-                label_error.config(text="Producto no encontrado")
-                entry_id.focus()
-                return
-            ventana_id.destroy()
-            self._confirmar_eliminacion(id_producto, producto)
-
-        frame_botones = tk.Frame(frame_id, bg="#ffffff")
-        frame_botones.pack(pady=10)
-        tk.Button(
-            frame_botones,
-            text="Cancelar",
-            command=ventana_id.destroy,
-            bg="#9E9E9E",
-            fg="white",
-            font=("Arial", 10),
-            width=15,
-            pady=5,
-            bd=0,
-            cursor="hand2"
-        ).pack(side=tk.LEFT, padx=5)
-        tk.Button(
-            frame_botones,
-            text="Continuar",
-            command=continuar,
-            bg="#F44336",
-            fg="white",
-            font=("Arial", 10),
-            width=15,
-            pady=5,
-            bd=0,
-            cursor="hand2"
-        ).pack(side=tk.RIGHT, padx=5)
-        ventana_id.bind('<Return>', continuar)
-        entry_id.focus_set()
+        def actualizar(id_producto, producto):
+            editando['id'] = id_producto
+            valores = (
+                (entry_nombre, producto.nombre),
+                (entry_precio, formatear_numero(str(int(producto.precio_total)))),
+                (entry_cantidad, str(producto.cantidad)),
+                (entry_precio_venta, formatear_numero(str(int(producto.precio_venta_usuario)))),
+            )
+            for entry, valor in valores:
+                entry.delete(0, tk.END)
+                entry.insert(0, valor)
+            entry_nombre.focus_set()
+        return actualizar
 
     def _confirmar_eliminacion(self, id_producto, producto):
         """
@@ -844,56 +1044,60 @@ class MainWindow:
         Muestra la información del producto a eliminar y lo resalta en el historial.
         """
         # Resaltar el producto en el historial con color rojo claro
-        for item in self.historial.get_children():
-            self.historial.item(item, tags=())
-        items = self.historial.get_children()
-        if id_producto is not None and 0 <= id_producto < len(items):
-            item = items[id_producto]
-            self.historial.item(item, tags=('eliminar_resaltado',))
-            self.historial.see(item)
-        self.historial.tag_configure('eliminar_resaltado', background='#ffcdd2')  # rojo claro
-
-        ventana = self._crear_ventana_emergente("Confirmar Eliminación", "400x350")
+        self._resaltar_en_historial(id_producto, 'eliminar_resaltado')
+        self._dialogos.mostrar(
+            "confirmar_eliminacion", "Confirmar Eliminación", "400x350",
+            self._construir_confirmar_eliminacion, id_producto, producto
+        )
+
+    def _construir_confirmar_eliminacion(self, dialogo):
+        """Crea la ventana de confirmación y devuelve la función que muestra cada producto."""
+        ventana = dialogo.ventana
+        # ID del producto que se confirma en esta apertura
+        eliminando = {'id': None}
         frame_confirmacion = tk.Frame(ventana, bg="#ffffff", padx=20, pady=20)
         frame_confirmacion.pack(fill=tk.BOTH, expand=True)
-        tk.Label(
+        label_pregunta = tk.Label(
             frame_confirmacion,
-            text=f"¿Está seguro de eliminar el producto '{producto.nombre}'?",
+            text="",
             font=("Arial", 10),
             bg="#ffffff",
             wraplength=350
-        ).pack(pady=(0, 10))
+        )
+        label_pregunta.pack(pady=(0, 10))
         # Información del producto (una línea por dato)
         info_frame = tk.Frame(frame_confirmacion, bg="#fff3e0", padx=10, pady=10, relief="solid", bd=1)
         info_frame.pack(pady=(0, 15), fill=tk.X)
-        tk.Label(info_frame, text=f"Nombre: {producto.nombre}", font=("Arial", 10), bg="#fff3e0").pack(anchor="w")
-        tk.Label(info_frame, text=f"Precio total: {formatear_pesos(producto.precio_total)}", font=("Arial", 10), bg="#fff3e0").pack(anchor="w")
-        tk.Label(info_frame, text=f"Cantidad: {producto.cantidad}", font=("Arial", 10), bg="#fff3e0").pack(anchor="w")
-        tk.Label(info_frame, text=f"Precio unitario: {formatear_pesos(producto.precio_unitario)}", font=("Arial", 10), bg="#fff3e0").pack(anchor="w")
-        tk.Label(info_frame, text=f"Precio venta: {formatear_pesos(producto.precio_venta_usuario)}", font=("Arial", 10), bg="#fff3e0").pack(anchor="w")
-        tk.Label(info_frame, text=f"Ganancia unitaria: {formatear_pesos(producto.ganancia_unitaria)}", font=("Arial", 10), bg="#fff3e0").pack(anchor="w")
-        tk.Label(info_frame, text=f"Ganancia total: {formatear_pesos(producto.ganancia_total)}", font=("Arial", 10), bg="#fff3e0").pack(anchor="w")
-        tk.Label(info_frame, text=f"Fecha: {producto.fecha}", font=("Arial", 10), bg="#fff3e0").pack(anchor="w")
+        datos = (
+            ("Nombre", lambda p: p.nombre),
+            ("Precio total", lambda p: formatear_pesos(p.precio_total)),
+            ("Cantidad", lambda p: p.cantidad),
+            ("Precio unitario", lambda p: formatear_pesos(p.precio_unitario)),
+            ("Precio venta", lambda p: formatear_pesos(p.precio_venta_usuario)),
+            ("Ganancia unitaria", lambda p: formatear_pesos(p.ganancia_unitaria)),
+            ("Ganancia total", lambda p: formatear_pesos(p.ganancia_total)),
+            ("Fecha", lambda p: p.fecha),
+        )
+        labels_info = []
+        for _ in datos:
+            label = tk.Label(info_frame, text="", font=("Arial", 10), bg="#fff3e0")
+            label.pack(anchor="w")
+            labels_info.append(label)
         def confirmar_eliminacion(event=None):
             try:
-                self.controller.eliminar_producto(id_producto)
-                ventana.destroy()
-                self.mostrar_historial()
+                self.controller.eliminar_producto(eliminando['id'])
+                dialogo.ocultar()
             except Exception as e:
                 messagebox.showerror("Error", f"Error al eliminar el producto: {str(e)}")
         def corregir():
-            ventana.destroy()
-            # Limpiar resaltado y actualizar historial
-            for item in self.historial.get_children():
-                self.historial.item(item, tags=())
-            self.mostrar_historial()
+            dialogo.ocultar()
+            # Limpiar resaltado
+            self.historial.limpiar_resaltado()
             self.eliminar_producto()
         def cerrar_y_limpiar():
-            ventana.destroy()
-            # Limpiar resaltado y actualizar historial
-            for item in self.historial.get_children():
-                self.historial.item(item, tags=())
-            self.mostrar_historial()
+            dialogo.ocultar()
+            # Limpiar resaltado
+            self.historial.limpiar_resaltado()
         frame_botones = tk.Frame(frame_confirmacion, bg="#ffffff")
         frame_botones.pack(fill=tk.X, pady=10)
         tk.Button(
@@ -935,7 +1139,14 @@ class MainWindow:
         boton_eliminar.pack(side=tk.RIGHT, padx=5)
         ventana.bind('<Return>', confirmar_eliminacion)
         ventana.protocol("WM_DELETE_WINDOW", cerrar_y_limpiar)
-        ventana.focus_set()
+
+        def actualizar(id_producto, producto):
+            eliminando['id'] = id_producto
+            label_pregunta.config(text=f"¿Está seguro de eliminar el producto '{producto.nombre}'?")
+            for label, (etiqueta, valor) in zip(labels_info, datos):
+                label.config(text=f"{etiqueta}: {valor(producto)}")
+            ventana.focus_set()
+        return actualizar
 
     def calcular_total_inversion_dia(self):
         """
@@ -943,26 +1154,53 @@ class MainWindow:
         Se puede cerrar con Enter.
         """
         total = self.controller.calcular_total_inversion_dia()
-        ventana = self._crear_ventana_emergente("Total Invertido", "400x300")
-        frame_principal = tk.Frame(ventana, bg="#ffffff", padx=20, pady=20)
+        self._dialogos.mostrar(
+            "total_inversion", "Total Invertido", "400x300",
+            lambda dialogo: self._construir_ventana_total(
+                dialogo, "💰 Total Invertido del Día", "#2196F3",
+                "Este es el total de inversión realizada hoy"),
+            total
+        )
+
+    def calcular_ganancia_total_dia(self):
+        """
+        Muestra una ventana informativa con la ganancia total del día actual.
+        Se puede cerrar con Enter.
+        """
+        ganancia = self.controller.calcular_ganancia_total_dia()
+        self._dialogos.mostrar(
+            "ganancia_total", "Ganancia Total", "400x300",
+            lambda dialogo: self._construir_ventana_total(
+                dialogo, "📈 Ganancia Total del Día", "#4CAF50",
+                "Este es el total de ganancia obtenida hoy"),
+            ganancia
+        )
+
+    def _construir_ventana_total(self, dialogo, titulo, color, descripcion):
+        """
+        Crea los widgets de una ventana de total del día y devuelve la función que
+        muestra el valor de cada apertura.
+        """
+        frame_principal = tk.Frame(dialogo.ventana, bg="#ffffff", padx=20, pady=20)
         frame_principal.pack(fill=tk.BOTH, expand=True)
         tk.Label(
             frame_principal,
-            text="💰 Total Invertido del Día",
+            text=titulo,
             font=("Arial", 16, "bold"),
             bg="#ffffff",
-            fg="#2196F3"
+            fg=color
         ).pack(pady=(0, 20))
-        tk.Label(
+        label_valor = tk.Label(
             frame_principal,
-            text=formatear_pesos(total),
+            text="",
             font=("Arial", 24, "bold"),
             bg="#ffffff",
             fg="#4CAF50"
-        ).pack(pady=20)
+        )
+        label_valor.pack(pady=20)
         tk.Label(
             frame_principal,
-            text="Este es el total de inversión realizada hoy",
+            text=descripcion,
             font=("Arial", 10),
             bg="#ffffff",
             fg="#666666"
@@ -970,8 +1208,8 @@ class MainWindow:
         boton_cerrar = tk.Button(
             frame_principal,
             text="Cerrar",
-            command=ventana.destroy,
-            bg="#2196F3",
+            command=dialogo.ocultar,
+            bg=color,
             fg="white",
             font=("Arial", 10),
             width=20,
@@ -980,131 +1218,480 @@ class MainWindow:
             cursor="hand2"
         )
         boton_cerrar.pack(pady=20)
-        ventana.bind('<Return>', lambda event: ventana.destroy())
-        boton_cerrar.focus_set()
+        dialogo.ventana.bind('<Return>', dialogo.ocultar)
 
-    def calcular_ganancia_total_dia(self):
+        def actualizar(valor):
+            label_valor.config(text=formatear_pesos(valor))
+            boton_cerrar.focus_set()
+        return actualizar
+
+    def exportar_excel(self):
         """
-        Muestra una ventana informativa con la ganancia total del día actual.
-        Se puede cerrar con Enter.
+        Abre la ventana de exportación del historial a Excel (.xlsx) o CSV, con
+        filtros opcionales por rango de fechas y nombre. La escritura se hace en
+        un hilo aparte, con barra de progreso y opción de cancelar.
         """
-        ganancia = self.controller.calcular_ganancia_total_dia()
-        ventana = self._crear_ventana_emergente("Ganancia Total", "400x300")
-        frame_principal = tk.Frame(ventana, bg="#ffffff", padx=20, pady=20)
-        frame_principal.pack(fill=tk.BOTH, expand=True)
-        tk.Label(
-            frame_principal,
-            text="📈 Ganancia Total del Día",
-            font=("Arial", 16, "bold"),
-            bg="#ffffff",
-            fg="#4CAF50"
-        ).pack(pady=(0, 20))
+        if not self.controller.obtener_productos():
+            messagebox.showinfo("Exportar a Excel", "No hay productos para exportar.")
+            return
+        self._dialogos.mostrar("exportar", "Exportar historial", "440x360", self._construir_exportar)
+
+    def _construir_exportar(self, dialogo):
+        """Crea la ventana de exportación y devuelve la función que la prepara en cada apertura."""
+        ventana = dialogo.ventana
+        frame = tk.Frame(ventana, bg="#ffffff", padx=20, pady=15)
+        frame.pack(fill=tk.BOTH, expand=True)
         tk.Label(
-            frame_principal,
-            text=formatear_pesos(ganancia),
-            font=("Arial", 24, "bold"),
+            frame,
+            text="Exportar historial",
+            font=("Arial", 14, "bold"),
             bg="#ffffff",
-            fg="#4CAF50"
-        ).pack(pady=20)
+            fg="#607d8b"
+        ).grid(row=0, column=0, columnspan=2, pady=(0, 10))
+        formato = tk.StringVar(value="xlsx")
+        frame_formato = tk.Frame(frame, bg="#ffffff")
+        frame_formato.grid(row=1, column=0, columnspan=2, pady=(0, 8))
+        tk.Radiobutton(
+            frame_formato, text="Excel (.xlsx)", variable=formato, value="xlsx", bg="#ffffff"
+        ).pack(side=tk.LEFT, padx=10)
+        tk.Radiobutton(
+            frame_formato, text="CSV (más rápido)", variable=formato, value="csv", bg="#ffffff"
+        ).pack(side=tk.LEFT, padx=10)
+        entradas = {}
+        for fila, (clave, texto) in enumerate([
+            ("desde", "Desde (AAAA-MM-DD):"),
+            ("hasta", "Hasta (AAAA-MM-DD):"),
+            ("nombre", "Nombre contiene:"),
+        ], start=2):
+            tk.Label(frame, text=texto, font=("Arial", 10), bg="#ffffff").grid(
+                row=fila, column=0, sticky="w", pady=3)
+            entradas[clave] = tk.Entry(frame, font=("Arial", 10), width=22)
+            entradas[clave].grid(row=fila, column=1, sticky="w", pady=3)
         tk.Label(
-            frame_principal,
-            text="Este es el total de ganancia obtenida hoy",
-            font=("Arial", 10),
-            bg="#ffffff",
-            fg="#666666"
-        ).pack(pady=10)
-        boton_cerrar = tk.Button(
-            frame_principal,
-            text="Cerrar",
-            command=ventana.destroy,
-            bg="#4CAF50",
+            frame, text="Deje los filtros vacíos para exportar todo.",
+            font=("Arial", 9), bg="#ffffff", fg="#888888"
+        ).grid(row=5, column=0, columnspan=2, pady=(0, 6))
+        barra = ttk.Progressbar(frame, orient=tk.HORIZONTAL, length=380, mode="determinate")
+        barra.grid(row=6, column=0, columnspan=2, pady=(4, 2))
+        label_estado = tk.Label(frame, text="", font=("Arial", 9), bg="#ffffff", fg="#757575")
+        label_estado.grid(row=7, column=0, columnspan=2)
+        frame_botones = tk.Frame(frame, bg="#ffffff")
+        frame_botones.grid(row=8, column=0, columnspan=2, pady=(10, 0))
+        cancelar = threading.Event()
+        # Avance de la exportación en curso (vacío si no se está exportando)
+        estado = {}
+
+        def iniciar(event=None):
+            if estado:
+                return
+            desde = entradas["desde"].get().strip()
+            hasta = entradas["hasta"].get().strip()
+            for fecha in (desde, hasta):
+                if fecha:
+                    try:
+                        datetime.date.fromisoformat(fecha)
+                    except ValueError:
+                        label_estado.config(text=f"Fecha inválida: {fecha}", fg="#f44336")
+                        return
+            # Copia de la selección: el hilo no recorre las estructuras del controlador
+            productos = self.controller.obtener_productos_filtrados(
+                desde or None, hasta or None, entradas["nombre"].get().strip() or None)
+            if not productos:
+                label_estado.config(text="Ningún producto coincide con los filtros.", fg="#f44336")
+                return
+            extension = formato.get()
+            archivo = filedialog.asksaveasfilename(
+                parent=ventana,
+                defaultextension="." + extension,
+                filetypes=[("Archivos de Excel", "*.xlsx")] if extension == "xlsx"
+                else [("Archivos CSV", "*.csv")],
+                title="Guardar historial como Excel" if extension == "xlsx"
+                else "Guardar historial como CSV"
+            )
+            if not archivo:
+                return
+            estado['escritas'] = 0
+            barra.config(maximum=len(productos))
+            boton_exportar.config(state=tk.DISABLED)
+
+            def trabajar():
+                try:
+                    estado['resultado'] = exportar_productos(
+                        archivo,
+                        productos,
+                        progreso=lambda escritas: estado.__setitem__('escritas', escritas),
+                        cancelado=cancelar.is_set
+                    )
+                except ExportacionCancelada:
+                    estado['cancelada'] = True
+                except Exception as e:
+                    estado['error'] = str(e)
+                finally:
+                    estado['terminada'] = True
+
+            threading.Thread(target=trabajar, name="exportacion", daemon=True).start()
+            revisar(archivo, len(productos))
+
+        def revisar(archivo, total):
+            # Tk solo se toca desde aquí: el hilo deja su avance en `estado`
+            barra.config(value=estado['escritas'])
+            label_estado.config(text=f"{estado['escritas']} de {total} filas", fg="#757575")
+            if not estado.get('terminada'):
+                ventana.after(100, revisar, archivo, total)
+                return
+            dialogo.ocultar()
+            if estado.get('error'):
+                messagebox.showerror("Exportar", f"Error al exportar: {estado['error']}")
+            elif not estado.get('cancelada'):
+                messagebox.showinfo(
+                    "Exportar",
+                    f"{estado['resultado']} productos exportados exitosamente a:\n{archivo}"
+                )
+
+        def cancelar_o_cerrar(event=None):
+            if estado and not estado.get('terminada'):
+                # La ventana se cierra cuando el hilo confirma la cancelación
+                cancelar.set()
+                label_estado.config(text="Cancelando...", fg="#757575")
+            else:
+                dialogo.ocultar()
+
+        boton_exportar = tk.Button(
+            frame_botones,
+            text="Exportar",
+            command=iniciar,
+            bg="#607d8b",
             fg="white",
             font=("Arial", 10),
-            width=20,
+            width=15,
             pady=5,
             bd=0,
             cursor="hand2"
         )
-        boton_cerrar.pack(pady=20)
-        ventana.bind('<Return>', lambda event: ventana.destroy())
-        boton_cerrar.focus_set()
+        boton_exportar.pack(side=tk.LEFT, padx=5)
+        tk.Button(
+            frame_botones,
+            text="Cancelar",
+            command=cancelar_o_cerrar,
+            bg="#9E9E9E",
+            fg="white",
+            font=("Arial", 10),
+            width=15,
+            pady=5,
+            bd=0,
+            cursor="hand2"
+        ).pack(side=tk.LEFT, padx=5)
+        ventana.protocol("WM_DELETE_WINDOW", cancelar_o_cerrar)
+        ventana.bind('<Return>', iniciar)
+        ventana.bind('<Escape>', cancelar_o_cerrar)
 
-    def exportar_excel(self):
+        def actualizar():
+            cancelar.clear()
+            estado.clear()
+            for entrada in entradas.values():
+                entrada.delete(0, tk.END)
+            barra.config(value=0)
+            label_estado.config(text="", fg="#757575")
+            boton_exportar.config(state=tk.NORMAL)
+            entradas["desde"].focus_set()
+        return actualizar
+
+    def importar_compras(self):
         """
-        Exporta el historial de productos a un archivo Excel (.xlsx), permitiendo elegir la ubicación.
+        Importa productos desde un archivo CSV o Excel (por ejemplo, una factura del
+        proveedor). El archivo se lee y valida en un hilo aparte; los productos
+        válidos se agregan en un solo lote y se informan las filas con errores.
         """
-        productos = self.controller.obtener_productos()
-        if not productos:
-            messagebox.showinfo("Exportar a Excel", "No hay productos para exportar.")
-            return
-        archivo = filedialog.asksaveasfilename(
-            defaultextension=".xlsx",
-            filetypes=[("Archivos de Excel", "*.xlsx")],
-            title="Guardar historial como Excel"
+        archivo = filedialog.askopenfilename(
+            filetypes=[("Hojas de cálculo", "*.csv *.xlsx"), ("Archivos CSV", "*.csv"),
+                       ("Archivos de Excel", "*.xlsx")],
+            title="Importar compras"
         )
         if not archivo:
             return
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Historial"
-        columnas = [
-            "ID", "Nombre", "Precio Total", "Cantidad", "Precio Unitario",
-            "Precio Venta", "Ganancia U.", "Ganancia Total", "Fecha"
-        ]
-        ws.append(columnas)
-        for idx, p in enumerate(productos):
-            ws.append([
-                idx + 1,
-                p.nombre,
-                p.precio_total,
-                p.cantidad,
-                p.precio_unitario,
-                p.precio_venta_usuario,
-                p.ganancia_unitaria,
-                p.ganancia_total,
-                p.fecha
-            ])
-        wb.save(archivo)
-        messagebox.showinfo("Exportar a Excel", f"Historial exportado exitosamente a:\n{archivo}")
-
-    def _crear_ventana_emergente(self, titulo, geometria):
-        """
-        Crea una ventana emergente personalizada con el título y tamaño especificados.
-        """
-        ventana = tk.Toplevel(self.root)
-        ventana.title(titulo)
-        ventana.geometry(geometria)
+        estado = {'leidas': 0}
+
+        def trabajar():
+            try:
+                estado['resultado'] = self.controller.leer_importacion(
+                    archivo, progreso=lambda leidas: estado.__setitem__('leidas', leidas))
+            except Exception as e:
+                estado['error'] = str(e)
+            finally:
+                estado['terminada'] = True
+
+        def revisar():
+            if not estado.get('terminada'):
+                self.label_estado_guardado.config(
+                    text=f"Importando... {estado['leidas']} filas leídas", fg="#757575")
+                self.root.after(100, revisar)
+                return
+            self.root.config(cursor="")
+            if estado.get('error'):
+                self.label_estado_guardado.config(text="", fg="#757575")
+                messagebox.showerror("Importar compras", f"Error al importar: {estado['error']}")
+                return
+            productos, errores = estado['resultado']
+            agregados = self.controller.agregar_productos(productos)
+            self.label_estado_guardado.config(text=f"{agregados} productos importados", fg="#757575")
+            mensaje = f"Se importaron {agregados} productos."
+            if errores:
+                mensaje += f"\n\n{len(errores)} filas con errores:\n"
+                mensaje += "\n".join(f"Fila {fila}: {error}" for fila, error in errores[:15])
+                if len(errores) > 15:
+                    mensaje += f"\n... y {len(errores) - 15} más"
+                messagebox.showwarning("Importar compras", mensaje)
+            else:
+                messagebox.showinfo("Importar compras", mensaje)
+
+        self.root.config(cursor="watch")
+        threading.Thread(target=trabajar, name="importacion", daemon=True).start()
+        revisar()
+
+    def mostrar_diagnostico(self):
+        """
+        Ventana de diagnóstico: percentiles de cada operación medida, contadores y
+        las últimas operaciones con su latencia. Se refresca sola mientras está abierta.
+        """
+        ventana = getattr(self, '_ventana_diagnostico', None)
+        if ventana is not None and ventana.winfo_exists():
+            ventana.deiconify()
+            ventana.lift()
+            return
+        # No es modal: se puede dejar abierta mientras se usa la aplicación
+        ventana = self._ventana_diagnostico = tk.Toplevel(self.root)
+        ventana.title("Diagnóstico de rendimiento")
+        ventana.geometry("760x560")
         ventana.configure(bg="#ffffff")
-        ventana.resizable(False, False)
-        ventana.transient(self.root)
-        ventana.grab_set()
-        
-        # Centrar la ventana
-        ventana.update_idletasks()
-        width = ventana.winfo_width()
-        height = ventana.winfo_height()
-        x = (ventana.winfo_screenwidth() // 2) - (width // 2)
-        y = (ventana.winfo_screenheight() // 2) - (height // 2)
-        ventana.geometry(f'{width}x{height}+{x}+{y}')
-        
-        return ventana 
+        frame = tk.Frame(ventana, bg="#ffffff", padx=15, pady=10)
+        frame.pack(fill=tk.BOTH, expand=True)
+        activa = tk.BooleanVar(value=instrumentacion.esta_activa())
+
+        def cambiar_estado():
+            if activa.get():
+                instrumentacion.activar()
+            else:
+                instrumentacion.desactivar()
+
+        tk.Checkbutton(
+            frame, text="Medir operaciones", variable=activa, command=cambiar_estado,
+            font=("Arial", 10, "bold"), bg="#ffffff"
+        ).pack(anchor="w")
+        tk.Label(frame, text="Operaciones (tiempos en ms)", font=("Arial", 11, "bold"),
+                 bg="#ffffff", fg="#607d8b").pack(anchor="w", pady=(6, 2))
+        columnas_metricas = ("Operación", "Llamadas", "p50", "p90", "p99", "Máx", "Total")
+        tabla_metricas = ttk.Treeview(frame, columns=columnas_metricas, show="headings", height=8)
+        for columna in columnas_metricas:
+            tabla_metricas.heading(columna, text=columna)
+            tabla_metricas.column(columna, width=240 if columna == "Operación" else 70,
+                                  anchor="w" if columna == "Operación" else "e")
+        tabla_metricas.pack(fill=tk.X)
+        label_contadores = tk.Label(frame, text="", font=("Arial", 9), bg="#ffffff",
+                                    fg="#757575", justify=tk.LEFT, anchor="w")
+        label_contadores.pack(fill=tk.X, pady=(4, 0))
+        tk.Label(frame, text=f"Últimas {self.OPERACIONES_DIAGNOSTICO} operaciones",
+                 font=("Arial", 11, "bold"), bg="#ffffff", fg="#607d8b").pack(anchor="w", pady=(6, 2))
+        columnas_recientes = ("Hora", "Operación", "ms", "Hilo")
+        tabla_recientes = ttk.Treeview(frame, columns=columnas_recientes, show="headings", height=10)
+        for columna, ancho in zip(columnas_recientes, (90, 300, 80, 120)):
+            tabla_recientes.heading(columna, text=columna)
+            tabla_recientes.column(columna, width=ancho, anchor="e" if columna == "ms" else "w")
+        tabla_recientes.pack(fill=tk.BOTH, expand=True)
+
+        def refrescar():
+            if not ventana.winfo_exists():
+                return
+            tabla_metricas.delete(*tabla_metricas.get_children())
+            for r in instrumentacion.resumen():
+                tabla_metricas.insert("", tk.END, values=(
+                    r.nombre, r.llamadas, f"{r.p50 * 1000:.2f}", f"{r.p90 * 1000:.2f}",
+                    f"{r.p99 * 1000:.2f}", f"{r.maximo * 1000:.2f}", f"{r.total * 1000:.0f}"
+                ))
+            contadores = instrumentacion.contadores()
+            label_contadores.config(text="  ".join(f"{k}: {v}" for k, v in sorted(contadores.items())))
+            tabla_recientes.delete(*tabla_recientes.get_children())
+            for o in instrumentacion.operaciones_recientes(self.OPERACIONES_DIAGNOSTICO):
+                tabla_recientes.insert("", tk.END, values=(
+                    datetime.datetime.fromtimestamp(o.hora).strftime("%H:%M:%S"),
+                    o.nombre, f"{o.segundos * 1000:.2f}", o.hilo
+                ))
+            ventana.after(self.INTERVALO_DIAGNOSTICO_MS, refrescar)
+
+        def exportar():
+            archivo = filedialog.asksaveasfilename(
+                parent=ventana,
+                defaultextension=".json",
+                filetypes=[("JSON", "*.json")],
+                title="Exportar diagnóstico"
+            )
+            if not archivo:
+                return
+            try:
+                instrumentacion.exportar(archivo)
+            except Exception as e:
+                messagebox.showerror("Error", f"No se pudo exportar el diagnóstico: {e}", parent=ventana)
+
+        frame_botones = tk.Frame(frame, bg="#ffffff")
+        frame_botones.pack(pady=(10, 0))
+        for texto, comando, color in [
+            ("Reiniciar", instrumentacion.reiniciar, "#FF9800"),
+            ("Exportar…", exportar, "#607d8b"),
+            ("Cerrar", ventana.destroy, "#2196F3"),
+        ]:
+            tk.Button(
+                frame_botones, text=texto, command=comando, bg=color, fg="white",
+                font=("Arial", 10), width=12, pady=4, bd=0, cursor="hand2"
+            ).pack(side=tk.LEFT, padx=5)
+        ventana.bind('<Escape>', lambda e: ventana.destroy())
+        refrescar()
 
-    # Placeholder para el nuevo botón de filtrado
     def filtrar_productos(self):
-        messagebox.showinfo("Filtrar productos", "Funcionalidad en desarrollo.")
+        """
+        Abre la ventana de filtros del historial: rango de fechas, nombre (contiene o
+        empieza con), precio total, cantidad y margen. La tabla se filtra mientras se
+        escribe; al ajustar un criterio solo se revisan los resultados anteriores.
+        """
+        self._dialogos.mostrar("filtrar", "Filtrar productos", "430x470", self._construir_filtrar)
+
+    def _construir_filtrar(self, dialogo):
+        """Crea la ventana de filtros y devuelve la función que carga el filtro aplicado."""
+        ventana = dialogo.ventana
+        frame = tk.Frame(ventana, bg="#ffffff", padx=20, pady=15)
+        frame.pack(fill=tk.BOTH, expand=True)
+        tk.Label(
+            frame,
+            text="Filtrar historial",
+            font=("Arial", 14, "bold"),
+            bg="#ffffff",
+            fg="#607d8b"
+        ).grid(row=0, column=0, columnspan=4, pady=(0, 10))
+        entradas = {}
+        # (texto, campo del filtro para "desde"/mínimo, campo para "hasta"/máximo)
+        filas = [
+            ("Fecha (AAAA-MM-DD):", "desde", "hasta"),
+            ("Precio total:", "precio_min", "precio_max"),
+            ("Cantidad:", "cantidad_min", "cantidad_max"),
+            ("Margen (%):", "margen_min", "margen_max"),
+        ]
+        tk.Label(frame, text="Desde / mínimo", font=("Arial", 9), bg="#ffffff", fg="#888888").grid(
+            row=1, column=1)
+        tk.Label(frame, text="Hasta / máximo", font=("Arial", 9), bg="#ffffff", fg="#888888").grid(
+            row=1, column=2)
+        for fila, (texto, campo_min, campo_max) in enumerate(filas, start=2):
+            tk.Label(frame, text=texto, font=("Arial", 10), bg="#ffffff").grid(
+                row=fila, column=0, sticky="w", pady=3)
+            for columna, campo in ((1, campo_min), (2, campo_max)):
+                entradas[campo] = tk.Entry(frame, font=("Arial", 10), width=12)
+                entradas[campo].grid(row=fila, column=columna, padx=3, pady=3)
+        for fila, (texto, campo) in enumerate([
+            ("Nombre contiene:", "nombre_contiene"),
+            ("Nombre empieza con:", "nombre_prefijo"),
+        ], start=len(filas) + 2):
+            tk.Label(frame, text=texto, font=("Arial", 10), bg="#ffffff").grid(
+                row=fila, column=0, sticky="w", pady=3)
+            entradas[campo] = tk.Entry(frame, font=("Arial", 10), width=26)
+            entradas[campo].grid(row=fila, column=1, columnspan=2, sticky="w", padx=3, pady=3)
+        label_estado = tk.Label(frame, text="", font=("Arial", 9), bg="#ffffff", fg="#757575",
+                                wraplength=380)
+        label_estado.grid(row=len(filas) + 4, column=0, columnspan=4, pady=(8, 0))
+        pendiente = None
+
+        def leer_filtro():
+            """Arma el Filtro con lo escrito (ValueError si algún dato es inválido)."""
+            valores = {}
+            for campo, entrada in entradas.items():
+                texto = entrada.get().strip()
+                if not texto:
+                    continue
+                if campo in ("desde", "hasta"):
+                    try:
+                        datetime.date.fromisoformat(texto)
+                    except ValueError:
+                        raise ValueError(f"Fecha inválida: {texto}")
+                    valores[campo] = texto
+                elif campo.startswith("nombre"):
+                    valores[campo] = texto
+                else:
+                    try:
+                        valores[campo] = convertir_numero(texto)
+                    except ValueError:
+                        raise ValueError(f"Número inválido: {texto}")
+            return Filtro(**valores)
+
+        def aplicar(event=None):
+            nonlocal pendiente
+            if pendiente is not None:
+                ventana.after_cancel(pendiente)
+                pendiente = None
+            try:
+                filtro = leer_filtro()
+            except ValueError as e:
+                label_estado.config(text=str(e), fg="#f44336")
+                return
+            self._filtro = filtro if filtro != Filtro() else None
+            self.mostrar_historial()
+            label_estado.config(text=self.label_filtro.cget("text") or "Sin filtro", fg="#757575")
+
+        def programar(event=None):
+            nonlocal pendiente
+            if pendiente is not None:
+                ventana.after_cancel(pendiente)
+            pendiente = ventana.after(self.ESPERA_BUSQUEDA_MS, aplicar)
+
+        def quitar_filtro():
+            for entrada in entradas.values():
+                entrada.delete(0, tk.END)
+            aplicar()
+
+        def cerrar(event=None):
+            nonlocal pendiente
+            if pendiente is not None:
+                ventana.after_cancel(pendiente)
+                pendiente = None
+            dialogo.ocultar()
+
+        for entrada in entradas.values():
+            entrada.bind('<KeyRelease>', programar)
+        frame_botones = tk.Frame(frame, bg="#ffffff")
+        frame_botones.grid(row=len(filas) + 5, column=0, columnspan=4, pady=(12, 0))
+        for texto, comando, color in [
+            ("Aplicar", aplicar, "#2196F3"),
+            ("Quitar filtro", quitar_filtro, "#FF9800"),
+            ("Cerrar", cerrar, "#607d8b"),
+        ]:
+            tk.Button(
+                frame_botones, text=texto, command=comando, bg=color, fg="white",
+                font=("Arial", 10), width=12, pady=4, bd=0, cursor="hand2"
+            ).pack(side=tk.LEFT, padx=5)
+        ventana.bind('<Return>', aplicar)
+        ventana.bind('<Escape>', cerrar)
+        ventana.protocol("WM_DELETE_WINDOW", cerrar)
+
+        def actualizar():
+            # Los campos muestran el filtro aplicado a la tabla
+            actual = self._filtro or Filtro()
+            for campo, entrada in entradas.items():
+                entrada.delete(0, tk.END)
+                valor = getattr(actual, campo)
+                if valor is not None:
+                    entrada.insert(0, str(valor))
+            label_estado.config(text="", fg="#757575")
+            entradas["nombre_contiene"].focus_set()
+        return actualizar
 
     # Nueva función para el resumen del día
     def mostrar_resumen_dia(self):
         """
         Muestra el resumen del día SOLO con los productos agregados en el día actual.
+        La ventana se crea la primera vez; luego solo se actualizan sus valores.
         """
         hoy = datetime.datetime.now().strftime("%Y-%m-%d")
-        productos_hoy = [p for p in self.controller.obtener_productos() if p.fecha == hoy]
-        total = sum(p.precio_total for p in productos_hoy)
-        ganancia = sum(p.ganancia_total for p in productos_hoy)
-        tipos = len(set(p.nombre for p in productos_hoy))
-        ventana = self._crear_ventana_emergente("Resumen del día", "340x260")
-        frame = tk.Frame(ventana, bg="#ffffff", padx=20, pady=20)
+        resumen = self.controller.obtener_resumen_dia(hoy)
+        self._dialogos.mostrar("resumen_dia", "Resumen del día", "340x260", self._construir_resumen_dia, resumen)
+
+    def _construir_resumen_dia(self, dialogo):
+        """Crea los widgets del resumen del día y devuelve la función que los actualiza."""
+        frame = tk.Frame(dialogo.ventana, bg="#ffffff", padx=20, pady=20)
         frame.pack(fill=tk.BOTH, expand=True)
         tk.Label(
             frame,
@@ -1113,31 +1700,34 @@ class MainWindow:
             bg="#ffffff",
             fg="#2196F3"
         ).pack(pady=(0, 12))
-        tk.Label(
+        label_total = tk.Label(
             frame,
-            text=f"Total invertido: {formatear_pesos(total)}",
+            text="",
             font=("Arial", 12, "bold"),
             bg="#ffffff",
             fg="#4CAF50"
-        ).pack(pady=6)
-        tk.Label(
+        )
+        label_total.pack(pady=6)
+        label_ganancia = tk.Label(
             frame,
-            text=f"Ganancia total: {formatear_pesos(ganancia)}",
+            text="",
             font=("Arial", 12, "bold"),
             bg="#ffffff",
             fg="#4CAF50"
-        ).pack(pady=6)
-        tk.Label(
+        )
+        label_ganancia.pack(pady=6)
+        label_tipos = tk.Label(
             frame,
-            text=f"Tipos de productos registrados: {tipos}",
+            text="",
             font=("Arial", 12),
             bg="#ffffff",
             fg="#607d8b"
-        ).pack(pady=6)
+        )
+        label_tipos.pack(pady=6)
         boton_cerrar = tk.Button(
             frame,
             text="Cerrar",
-            command=ventana.destroy,
+            command=dialogo.ocultar,
             bg="#2196F3",
             fg="white",
             font=("Arial", 10),
@@ -1147,5 +1737,11 @@ class MainWindow:
             cursor="hand2"
         )
         boton_cerrar.pack(pady=12)
-        ventana.bind('<Return>', lambda event: ventana.destroy())
-        boton_cerrar.focus_set() 
\ No newline at end of file
+        dialogo.ventana.bind('<Return>', dialogo.ocultar)
+
+        def actualizar(resumen):
+            label_total.config(text=f"Total invertido: {formatear_pesos(resumen.total_inversion)}")
+            label_ganancia.config(text=f"Ganancia total: {formatear_pesos(resumen.ganancia_total)}")
+            label_tipos.config(text=f"Tipos de productos registrados: {resumen.tipos}")
+            boton_cerrar.focus_set()
+        return actualizar 
\ No newline at end of file